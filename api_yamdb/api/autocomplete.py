@@ -0,0 +1,181 @@
+import re
+import time
+from heapq import nlargest
+from itertools import chain
+from threading import Lock, Thread
+
+from django.conf import settings
+from django.db import connection
+
+from reviews.models import Title
+
+MAX_PREFIX_LENGTH = 16
+TOP_SIZE = 10
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    return NON_WORD.sub(' ', text.lower().replace('ё', 'е')).strip()
+
+
+def title_keys(name):
+    words = normalize(name).split()
+    return {
+        ' '.join(words[index:])[:MAX_PREFIX_LENGTH]
+        for index in range(len(words))
+    }
+
+
+class Node:
+    __slots__ = ('children', 'terminal', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.terminal = set()
+        self.top = []
+
+
+class TitlePrefixIndex:
+    def __init__(self):
+        self.lock = Lock()
+        self.build_lock = Lock()
+        self.root = None
+        self.titles = {}
+        self.built = 0
+
+    @staticmethod
+    def score(title_id, title):
+        name, year, rating, reviews_count = title
+        return (rating if rating is not None else -1, reviews_count,
+                -title_id)
+
+    @staticmethod
+    def load(queryset):
+        titles = {}
+        for pk, name, year, score_sum, reviews_count in queryset.order_by(
+        ).values_list(
+            'pk', 'name', 'year', 'score_sum', 'reviews_count'
+        ).iterator():
+            rating = score_sum / reviews_count if reviews_count else None
+            titles[pk] = (name, year, rating, reviews_count)
+        return titles
+
+    def build(self):
+        titles = self.load(Title.objects.all())
+        root = Node()
+        for title_id, title in titles.items():
+            for key in title_keys(title[0]):
+                self.walk(root, key)[-1].terminal.add(title_id)
+        self.fill(root, titles)
+        with self.lock:
+            self.root, self.titles = root, titles
+            self.built = time.monotonic()
+
+    def fill(self, node, titles):
+        for child in node.children.values():
+            self.fill(child, titles)
+        self.refresh_top(node, titles)
+
+    def refresh_top(self, node, titles):
+        node.top = nlargest(TOP_SIZE, chain(
+            chain.from_iterable(
+                child.top for child in node.children.values()
+            ),
+            ((self.score(title_id, titles[title_id]), title_id)
+             for title_id in node.terminal),
+        ))
+
+    @staticmethod
+    def walk(root, key, create=True):
+        path = [root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                if not create:
+                    return None
+                node = path[-1].children[char] = Node()
+            path.append(node)
+        return path
+
+    def ensure_built(self):
+        if self.root is None:
+            with self.build_lock:
+                if self.root is None:
+                    self.build()
+            return
+        interval = settings.AUTOCOMPLETE_REFRESH_INTERVAL
+        if (interval and time.monotonic() - self.built > interval
+                and self.build_lock.acquire(blocking=False)):
+            Thread(target=self.background_build, daemon=True).start()
+
+    def background_build(self):
+        try:
+            self.build()
+        finally:
+            self.build_lock.release()
+            connection.close()
+
+    def matches(self, title_id, query):
+        words = normalize(self.titles[title_id][0]).split()
+        return any(
+            ' '.join(words[index:]).startswith(query)
+            for index in range(len(words))
+        )
+
+    def search(self, text, limit=TOP_SIZE):
+        query = normalize(text)
+        if not query:
+            return []
+        self.ensure_built()
+        with self.lock:
+            path = self.walk(self.root, query[:MAX_PREFIX_LENGTH], False)
+            if path is None:
+                return []
+            if len(query) > MAX_PREFIX_LENGTH:
+                found = nlargest(limit, (
+                    (self.score(title_id, self.titles[title_id]), title_id)
+                    for title_id in path[-1].terminal
+                    if self.matches(title_id, query)
+                ))
+            else:
+                found = path[-1].top[:limit]
+            return [
+                (title_id, *self.titles[title_id][:3])
+                for _, title_id in found
+            ]
+
+    def update(self, titles):
+        with self.lock:
+            if self.root is None:
+                return
+            nodes = {}
+            for title_id, title in titles.items():
+                previous = self.titles.pop(title_id, None)
+                for entry, change in ((previous, set.discard),
+                                      (title, set.add)):
+                    if entry is None:
+                        continue
+                    for key in title_keys(entry[0]):
+                        path = self.walk(self.root, key)
+                        change(path[-1].terminal, title_id)
+                        for depth, node in enumerate(path):
+                            nodes[id(node)] = (depth, node)
+                if title is not None:
+                    self.titles[title_id] = title
+            for _, node in sorted(nodes.values(), key=lambda item: -item[0]):
+                self.refresh_top(node, self.titles)
+
+    def reload(self, title_ids):
+        if self.root is None:
+            return
+        titles = dict.fromkeys(title_ids)
+        titles.update(self.load(Title.objects.filter(pk__in=title_ids)))
+        self.update(titles)
+
+    def clear(self):
+        with self.lock:
+            self.root = None
+            self.titles = {}
+
+
+title_index = TitlePrefixIndex()
@@ -0,0 +1,50 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+KEY_PREFIX = 'response-cache'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def generation_key(namespace):
+    return f'{KEY_PREFIX}:generation:{namespace}'
+
+
+def get_generations(namespaces):
+    cache = get_cache()
+    keys = [generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        cache.set(generation_key(namespace), time.time_ns(), None)
+
+
+def invalidate(*namespaces):
+    transaction.on_commit(lambda: bump_generations(namespaces))
+
+
+def response_key(request, namespaces, params=None, kind='response'):
+    query = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if params is None or name in params
+    )
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    generations = ':'.join(map(str, get_generations(namespaces)))
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{kind}:{generations}:{digest}'
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register()
+def check_response_cache(app_configs, **kwargs):
+    if not settings.RESPONSE_CACHE_TIMEOUT:
+        return []
+    backend = settings.CACHES[settings.RESPONSE_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'Кеш ответов включён, но кеш {settings.RESPONSE_CACHE_ALIAS!r} '
+        f'использует {backend}: у каждого процесса он свой, и воркеры '
+        'отдают устаревшие ответы после изменений в других процессах.',
+        hint='Настройте для RESPONSE_CACHE_ALIAS общий кеш (Redis, '
+             'Memcached) или задайте RESPONSE_CACHE_TIMEOUT = 0.',
+        id='api.E001',
+    )]
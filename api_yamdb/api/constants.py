@@ -0,0 +1,8 @@
+GENRE_MODE_ANY = 'any'
+GENRE_MODE_ALL = 'all'
+GENRE_MODES = (
+    (GENRE_MODE_ANY, 'Любой из жанров'),
+    (GENRE_MODE_ALL, 'Все жанры'),
+)
+FACETS_QUERY_PARAM = 'facets'
+TITLE_FACETS = ('category', 'genre', 'year')
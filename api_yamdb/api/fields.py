@@ -0,0 +1,47 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+
+class SlugMapManyRelatedField(ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slugs = [self.child_relation.to_slug(item) for item in data]
+        found = self.child_relation.slug_map.get_many(slugs)
+        for slug in slugs:
+            if slug not in found:
+                self.child_relation.fail(
+                    'does_not_exist',
+                    slug_name=self.child_relation.slug_field,
+                    value=slug
+                )
+        return [found[slug] for slug in slugs]
+
+
+class SlugMapRelatedField(serializers.SlugRelatedField):
+    def __init__(self, slug_map, **kwargs):
+        self.slug_map = slug_map
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugMapManyRelatedField(**list_kwargs)
+
+    def to_slug(self, data):
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail('invalid')
+        return str(data)
+
+    def to_internal_value(self, data):
+        instance = self.slug_map.get(self.to_slug(data))
+        if instance is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return instance
@@ -1,16 +1,100 @@
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, Value, When
 from django_filters import rest_framework
 
-from reviews.models import Title
+from api.constants import GENRE_MODE_ALL, GENRE_MODES
+from api.slugs import category_slugs, genre_slugs
+from reviews.models import Comment, Review, Title, TitleGenre
+
+User = get_user_model()
+
+
+class TextSearchFilterSet(rest_framework.FilterSet):
+    q = rest_framework.CharFilter(method='filter_search', required=True)
+    author = rest_framework.CharFilter(method='filter_author')
+    date_from = rest_framework.DateTimeFilter(field_name='pub_date',
+                                              lookup_expr='gte')
+    date_to = rest_framework.DateTimeFilter(field_name='pub_date',
+                                            lookup_expr='lte')
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+    def filter_author(self, queryset, name, value):
+        return queryset.filter(author__in=User.objects.filter(
+            username=value
+        ).values('pk'))
 
 
 class TitleFilterSet(rest_framework.FilterSet):
-    category = rest_framework.CharFilter(field_name='category__slug',
-                                         lookup_expr='iexact')
-    genre = rest_framework.CharFilter(field_name='genre__slug',
-                                      lookup_expr='iexact')
+    category = rest_framework.CharFilter(method='filter_category')
+    genre = rest_framework.CharFilter(method='filter_genre')
+    genre_mode = rest_framework.ChoiceFilter(choices=GENRE_MODES,
+                                             method='filter_genre_mode')
     name = rest_framework.CharFilter(field_name='name',
                                      lookup_expr='icontains')
+    search = rest_framework.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'genre_mode', 'name', 'year',
+                  'search')
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            category_id__in=category_slugs.ids_iexact(value)
+        )
+
+    def filter_genre(self, queryset, name, value):
+        slugs = dict.fromkeys(
+            slug.strip().lower() for slug in value.split(',') if slug.strip()
+        )
+        groups = [genre_slugs.ids_iexact(slug) for slug in slugs]
+        links = TitleGenre.objects.filter(
+            genre_id__in=list(chain.from_iterable(groups))
+        )
+        if (self.form.cleaned_data.get('genre_mode') == GENRE_MODE_ALL
+                and len(groups) > 1):
+            if not all(groups):
+                return queryset.none()
+            links = links.values('title_id').annotate(matched=Count(Case(*(
+                When(genre_id__in=ids, then=Value(index))
+                for index, ids in enumerate(groups)
+            )), distinct=True)).filter(matched=len(groups))
+        return queryset.filter(pk__in=links.values('title_id'))
+
+    def filter_genre_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class TopTitleFilterSet(TitleFilterSet):
+    def filter_genre(self, queryset, name, value):
+        genre_ids = genre_slugs.ids_iexact(value.strip())
+        if len(genre_ids) != 1:
+            return super().filter_genre(queryset, name, value)
+        return queryset.filter(titlegenre__genre_id=genre_ids[0]).annotate(
+            top_rating=F('titlegenre__weighted_rating'),
+            top_id=F('titlegenre__title_id'),
+        )
+
+
+class ReviewSearchFilterSet(TextSearchFilterSet):
+    title = rest_framework.NumberFilter(field_name='title_id')
+
+    class Meta:
+        model = Review
+        fields = ('q', 'title', 'author', 'date_from', 'date_to')
+
+
+class CommentSearchFilterSet(TextSearchFilterSet):
+    title = rest_framework.NumberFilter(field_name='review__title_id')
+    review = rest_framework.NumberFilter(field_name='review_id')
+
+    class Meta:
+        model = Comment
+        fields = ('q', 'title', 'review', 'author', 'date_from', 'date_to')
@@ -0,0 +1,372 @@
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from reviews.models import Comment, Genre, Review, Title
+from users.authentication import verified_tokens
+
+User = get_user_model()
+
+BENCHMARK_USERNAME = 'benchmark_user'
+SIGNUP_USERNAME_PREFIX = 'bench_'
+API_PREFIX = '/api/v1'
+DEFAULT_GENERATED_REVIEWS = 10 ** 4
+
+
+def wsgi_environ(method, path, query='', body=None, token=None):
+    body = json.dumps(body).encode() if body is not None else b''
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if token:
+        environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return environ
+
+
+def percentile(quantiles, value):
+    return round(quantiles[value - 1] * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест эндпоинтов API через WSGI-приложение с '
+            'отчётом о пропускной способности и перцентилях задержки')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Количество запросов к каждому эндпоинту',
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--endpoints',
+            nargs='+',
+            help='Запустить только указанные сценарии',
+        )
+        parser.add_argument(
+            '--generate',
+            type=float,
+            metavar='REVIEWS',
+            help=('Количество отзывов, которые generate_data создаёт во '
+                  f'временной БД перед запуском, по умолчанию '
+                  f'{DEFAULT_GENERATED_REVIEWS}'),
+        )
+        parser.add_argument(
+            '--existing-db',
+            action='store_true',
+            help=('Запустить тест на настроенной БД без генерации данных; '
+                  'созданные тестом пользователи удаляются в конце'),
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--save-baseline',
+            metavar='PATH',
+            help='Сохранить результаты в JSON файл',
+        )
+        parser.add_argument(
+            '--baseline',
+            metavar='PATH',
+            help='Сравнить результаты с сохранённым JSON файлом',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Допустимое ухудшение p95 и пропускной способности',
+        )
+
+    def handle(self, *args, **options):
+        from api_yamdb.wsgi import application
+
+        if options['requests'] < 2 or options['concurrency'] < 1:
+            raise CommandError(
+                'Нужно не меньше двух запросов и одного потока.'
+            )
+        if options['generate'] is not None:
+            if options['existing_db']:
+                raise CommandError(
+                    'С параметром --existing-db данные не генерируются.'
+                )
+            if options['generate'] < 1:
+                raise CommandError(
+                    'Значение --generate должно быть больше нуля.'
+                )
+        self.run_id = uuid.uuid4().hex[:8]
+        self.created_user = False
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        ), self.benchmark_database(options):
+            self.benchmark(application, options)
+
+    @contextmanager
+    def benchmark_database(self, options):
+        if options['existing_db']:
+            try:
+                yield
+            finally:
+                User.objects.filter(username__startswith=(
+                    f'{SIGNUP_USERNAME_PREFIX}{self.run_id}_'
+                )).delete()
+                if self.created_user:
+                    User.objects.filter(username=BENCHMARK_USERNAME).delete()
+            return
+        test_settings = connection.settings_dict['TEST']
+        test_name = test_settings['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                test_settings['NAME'] = os.path.join(
+                    directory, 'benchmark.sqlite3'
+                )
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                reviews = int(
+                    options['generate'] or DEFAULT_GENERATED_REVIEWS
+                )
+                call_command(
+                    'generate_data',
+                    reviews=reviews,
+                    titles=max(10, reviews // 100),
+                    users=max(100, reviews // 20),
+                    seed=options['seed'],
+                    stdout=self.stdout,
+                )
+                yield
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = test_name
+
+    def benchmark(self, application, options):
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING(
+                'DEBUG = True: результаты будут хуже, чем в продакшене.'
+            ))
+        self.application = application
+        scenarios = self.get_scenarios()
+        names = options['endpoints'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}. '
+                f'Доступны: {", ".join(scenarios)}'
+            )
+
+        verified_tokens.clear()
+        results = {}
+        for name in names:
+            results[name] = self.run_scenario(
+                name,
+                scenarios[name],
+                options['requests'],
+                options['concurrency'],
+                options['warmup'],
+            )
+            self.print_result(name, results[name])
+        token_cache = verified_tokens.info()
+        self.stdout.write(
+            f'Кеш проверенных токенов: попаданий {token_cache["hits"]}, '
+            f'промахов {token_cache["misses"]}'
+        )
+
+        report = {
+            'meta': {
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'titles': Title.objects.count(),
+                'reviews': Review.objects.count(),
+                'comments': Comment.objects.count(),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'existing_db': options['existing_db'],
+                'token_cache': token_cache,
+            },
+            'endpoints': results,
+        }
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                f'Результаты сохранены в {options["save_baseline"]}'
+            )
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def get_scenarios(self):
+        title = Title.objects.order_by('-reviews_count', 'id').first()
+        if title is None:
+            raise CommandError(
+                'В базе нет произведений: загрузите данные через import_csv '
+                'или запустите команду без параметра --existing-db.'
+            )
+        genre = Genre.objects.filter(titles=title).first()
+        review = Review.objects.filter(title=title).first()
+        comment = Comment.objects.select_related('review').first()
+        user, self.created_user = User.objects.get_or_create(
+            username=BENCHMARK_USERNAME,
+            defaults={'email': f'{BENCHMARK_USERNAME}@yamdb.fake'},
+        )
+        confirmation_code = user.get_confirmation_code()
+        token = user.get_tokens_for_user()
+
+        titles_url = f'{API_PREFIX}/titles/'
+        title_filter = f'year={title.year}'
+        if title.category_id:
+            title_filter += f'&category={title.category.slug}'
+        pages = min(5, -(-Title.objects.count() // settings.REST_FRAMEWORK[
+            'PAGE_SIZE'
+        ]))
+        scenarios = {
+            'titles_list': lambda i: (
+                'GET', titles_url, f'page={i % pages + 1}'
+            ),
+            'titles_cursor': lambda i: (
+                'GET', titles_url, 'pagination=cursor'
+            ),
+            'title_detail': lambda i: ('GET', f'{titles_url}{title.id}/'),
+            'titles_filter': lambda i: ('GET', titles_url, title_filter),
+            'title_detail_auth': lambda i: (
+                'GET', f'{titles_url}{title.id}/', '', None, token
+            ),
+        }
+        if genre:
+            scenarios['titles_genre'] = lambda i: (
+                'GET', titles_url, f'genre={genre.slug}'
+            )
+        reviews_url = f'{titles_url}{title.id}/reviews/'
+        scenarios['reviews_list'] = lambda i: ('GET', reviews_url)
+        if review:
+            scenarios['review_detail'] = lambda i: (
+                'GET', f'{reviews_url}{review.id}/'
+            )
+        if comment:
+            comments_url = (
+                f'{titles_url}{comment.review.title_id}/reviews/'
+                f'{comment.review_id}/comments/'
+            )
+            scenarios['comments_list'] = lambda i: ('GET', comments_url)
+            scenarios['comment_detail'] = lambda i: (
+                'GET', f'{comments_url}{comment.id}/'
+            )
+        scenarios['signup'] = lambda i: (
+            'POST', f'{API_PREFIX}/auth/signup/', '', {
+                'username': f'{SIGNUP_USERNAME_PREFIX}{self.run_id}_{i}',
+                'email': f'{SIGNUP_USERNAME_PREFIX}{self.run_id}_{i}'
+                         '@yamdb.fake',
+            }
+        )
+        scenarios['token'] = lambda i: (
+            'POST', f'{API_PREFIX}/auth/token/', '', {
+                'username': BENCHMARK_USERNAME,
+                'confirmation_code': confirmation_code,
+            }
+        )
+        return scenarios
+
+    def request(self, method, path, query='', body=None, token=None):
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split()[0]))
+
+        started = time.perf_counter()
+        response = self.application(
+            wsgi_environ(method, path, query, body, token), start_response
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return time.perf_counter() - started, status[0]
+
+    def run_scenario(self, name, scenario, requests, concurrency, warmup):
+        for index in range(requests, requests + warmup):
+            self.request(*scenario(index))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            measured = list(executor.map(
+                lambda index: self.request(*scenario(index)), range(requests)
+            ))
+            elapsed = time.perf_counter() - started
+        latencies = [latency for latency, _ in measured]
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        return {
+            'rps': round(requests / elapsed, 2),
+            'p50_ms': percentile(quantiles, 50),
+            'p95_ms': percentile(quantiles, 95),
+            'p99_ms': percentile(quantiles, 99),
+            'errors': sum(status >= 400 for _, status in measured),
+        }
+
+    def print_result(self, name, result):
+        line = (
+            f'{name:<18} {result["rps"]:>9.1f} rps  '
+            f'p50 {result["p50_ms"]:>8.2f} мс  '
+            f'p95 {result["p95_ms"]:>8.2f} мс  '
+            f'p99 {result["p99_ms"]:>8.2f} мс'
+        )
+        if result['errors']:
+            line = self.style.ERROR(f'{line}  ошибок: {result["errors"]}')
+        self.stdout.write(line)
+
+    def compare(self, results, baseline_path, tolerance):
+        with open(baseline_path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['endpoints']
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            previous = baseline[name]
+            if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {previous["p95_ms"]} -> '
+                    f'{result["p95_ms"]} мс'
+                )
+            if result['rps'] < previous['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{name}: {previous["rps"]} -> {result["rps"]} rps'
+                )
+            if result['errors'] > previous['errors']:
+                regressions.append(
+                    f'{name}: ошибок {previous["errors"]} -> '
+                    f'{result["errors"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Ухудшение относительно ' + baseline_path + ':\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Регрессий относительно {baseline_path} нет.'
+        ))
@@ -1,6 +1,14 @@
-from rest_framework import filters, mixins, viewsets
+from hashlib import md5
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import filters, mixins, status, viewsets
 from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.response import Response
 
+from api.cache import get_cache, response_key
 from users.permissions import AdminOrReadOnly
 
 
@@ -11,7 +19,108 @@ class NoPutModelViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
 
-class CategoryGenreMixin(mixins.CreateModelMixin,
+class NestedViewSetMixin:
+    def get_parent_object(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        results = response.data
+        if isinstance(results, dict):
+            results = results.get('results')
+        if not results:
+            self.get_parent_object()
+        return response
+
+
+class KeysetPaginationMixin:
+    pagination_query_param = 'pagination'
+    keyset_pagination_value = 'cursor'
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get(
+                    self.pagination_query_param
+            ) == self.keyset_pagination_value:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
+
+
+class ConditionalGetMixin:
+    def get_version_stamp(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        try:
+            stamp = self.get_version_stamp()
+        except (TypeError, ValueError, ValidationError):
+            stamp = None
+        if stamp is None:
+            return handler(request, *args, **kwargs)
+        version, modified = stamp
+        etag = quote_etag(md5(
+            f'{version}:{modified.isoformat()}:{request.get_full_path()}:'
+            f'{request.accepted_media_type}'.encode()
+        ).hexdigest())
+        last_modified = int(modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedListMixin:
+    cache_namespace = None
+
+    def get_cache_namespaces(self):
+        return (self.cache_namespace,)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_key(request, self.get_cache_namespaces())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+class CachedResponseMixin(CachedListMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CategoryGenreMixin(CachedListMixin,
+                         mixins.CreateModelMixin,
                          mixins.DestroyModelMixin,
                          mixins.ListModelMixin,
                          viewsets.GenericViewSet):
@@ -1,8 +1,11 @@
 from datetime import datetime
 
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers, validators
 from rest_framework.relations import SlugRelatedField
 
+from api.fields import SlugMapRelatedField
+from api.slugs import category_slugs, genre_slugs
 from reviews.models import Category, Comment, Genre, Review, Title
 
 
@@ -19,14 +22,14 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+    category = SlugMapRelatedField(
+        category_slugs,
         queryset=Category.objects.all(),
-        slug_field='slug',
         required=True
     )
-    genre = serializers.SlugRelatedField(
+    genre = SlugMapRelatedField(
+        genre_slugs,
         queryset=Genre.objects.all(),
-        slug_field='slug',
         many=True,
         required=True,
         allow_empty=False,
@@ -48,6 +51,7 @@ class TitleSerializer(serializers.ModelSerializer):
         return value
 
     def to_representation(self, instance):
+        prefetch_related_objects([instance], 'genre')
         representation = super().to_representation(instance)
         representation['category'] = CategorySerializer(instance.category).data
         representation['genre'] = GenreSerializer(
@@ -55,6 +59,12 @@ class TitleSerializer(serializers.ModelSerializer):
         return representation
 
 
+class TopTitleSerializer(TitleSerializer):
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('weighted_rating',)
+        read_only_fields = ('weighted_rating',)
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(slug_field='username', read_only=True)
 
@@ -66,7 +76,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         title_id = self.context['view'].kwargs['title_id']
         request = self.context['request']
         if request.method == 'POST' and Review.objects.filter(
-           title_id=title_id, author=request.user).exists():
+           title_id=title_id, author_id=request.user.pk).exists():
             raise validators.ValidationError(
                 'Вы уже оставляли отзыв на это произведение.'
             )
@@ -79,3 +89,17 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class ReviewSearchSerializer(ReviewSerializer):
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
+        read_only_fields = fields
+
+
+class CommentSearchSerializer(CommentSerializer):
+    title = serializers.IntegerField(source='review.title_id', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = ('id', 'title', 'review', 'text', 'author', 'pub_date')
+        read_only_fields = fields
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from api.autocomplete import title_index
+from api.cache import invalidate
+from reviews.models import Category, Genre, Review, Title, TitleGenre
+from reviews.signals import catalog_changed
+
+
+@receiver((post_save, post_delete), sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate('titles', f'title:{instance.pk}')
+
+
+@receiver((post_save, post_delete), sender=TitleGenre)
+@receiver((post_save, post_delete), sender=Review)
+def invalidate_title_relation(sender, instance, **kwargs):
+    invalidate('titles', f'title:{instance.title_id}')
+
+
+@receiver(pre_save, sender=Review)
+def invalidate_previous_title(sender, instance, **kwargs):
+    title_id = getattr(instance, 'loaded_title_id', None)
+    if title_id is not None and title_id != instance.title_id:
+        invalidate('titles', f'title:{title_id}')
+        transaction.on_commit(lambda: title_index.reload((title_id,)))
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate('titles', f'title:{instance.pk}')
+    elif pk_set:
+        invalidate('titles', *(f'title:{pk}' for pk in pk_set))
+    else:
+        invalidate('titles', 'catalog')
+
+
+@receiver((post_save, post_delete), sender=Genre)
+def invalidate_genre(sender, instance, **kwargs):
+    invalidate('genres', 'titles', 'catalog')
+
+
+@receiver((post_save, post_delete), sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate('categories', 'titles', 'catalog')
+
+
+@receiver((post_save, post_delete), sender=Title)
+def reload_title_prefixes(sender, instance, **kwargs):
+    title_id = instance.pk
+    transaction.on_commit(lambda: title_index.reload((title_id,)))
+
+
+@receiver((post_save, post_delete), sender=Review)
+def reload_title_rating_prefixes(sender, instance, **kwargs):
+    title_id = instance.title_id
+    transaction.on_commit(lambda: title_index.reload((title_id,)))
+
+
+@receiver(catalog_changed)
+def invalidate_catalog(sender, **kwargs):
+    invalidate('titles', 'catalog', 'genres', 'categories')
@@ -0,0 +1,85 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+
+from api.cache import get_generations
+from reviews.models import Category, Genre
+
+
+class SlugMap:
+    def __init__(self, model, namespace):
+        self.model = model
+        self.namespace = namespace
+        self.lock = Lock()
+        self.generation = None
+        self.loaded = 0
+        self.rows = {}
+        self.ids = {}
+        self.slugs = {}
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def is_fresh(self, generation):
+        if generation != self.generation:
+            return False
+        return time.monotonic() - self.loaded < settings.SLUG_MAP_TIMEOUT
+
+    def load(self):
+        generation, = get_generations((self.namespace,))
+        if self.is_fresh(generation):
+            return self.rows
+        with self.lock:
+            if not self.is_fresh(generation):
+                rows, ids, slugs = {}, {}, {}
+                for pk, name, slug in self.model.objects.values_list(
+                        'pk', 'name', 'slug'):
+                    rows[slug] = (pk, name)
+                    ids.setdefault(slug.lower(), []).append(pk)
+                    slugs[pk] = slug
+                self.rows, self.ids, self.slugs = rows, ids, slugs
+                self.generation = generation
+                self.loaded = time.monotonic()
+        return self.rows
+
+    def expire(self):
+        self.generation = None
+
+    def get_many(self, slugs):
+        found = {
+            instance.slug: instance
+            for instance in self.model.objects.filter(slug__in=set(slugs))
+        }
+        if any(slug not in self.rows for slug in found):
+            self.expire()
+        return found
+
+    def get(self, slug):
+        return self.get_many((slug,)).get(slug)
+
+    def ids_iexact(self, slug):
+        self.load()
+        ids = self.ids.get(slug.lower())
+        if ids is None:
+            ids = list(self.model.objects.filter(
+                slug__iexact=slug
+            ).values_list('pk', flat=True))
+            if ids:
+                self.expire()
+        return ids
+
+    def slug(self, pk):
+        self.load()
+        slug = self.slugs.get(pk)
+        if slug is None:
+            slug = self.model.objects.filter(pk=pk).values_list(
+                'slug', flat=True
+            ).first()
+            if slug is not None:
+                self.expire()
+        return slug
+
+
+category_slugs = SlugMap(Category, 'categories')
+genre_slugs = SlugMap(Genre, 'genres')
@@ -1,7 +1,8 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
+from api.views import (CategoryViewSet, CommentSearchViewSet,
+                       CommentViewSet, GenreViewSet, ReviewSearchViewSet,
                        ReviewViewSet, TitleViewSet)
 from users.views import UserCreateViewSet, UserTokenViewSet, UserViewSet
 
@@ -21,7 +22,12 @@ v1_router.register(
     CommentViewSet,
     basename='comments'
 )
-
+v1_router.register(
+    'search/reviews', ReviewSearchViewSet, basename='search-reviews'
+)
+v1_router.register(
+    'search/comments', CommentSearchViewSet, basename='search-comments'
+)
 
 urlpatterns = [
     path('v1/auth/token/', UserTokenViewSet.as_view({'post': 'create'})),
@@ -1,67 +1,246 @@
-from django.db import models
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-
-from api.filters import TitleFilterSet
-from api.mixins import CategoryGenreMixin, NoPutModelViewSet
-from api.serializers import (CategorySerializer, CommentSerializer,
-                             GenreSerializer, ReviewSerializer,
-                             TitleSerializer)
-from reviews.models import Category, Genre, Title
+from rest_framework.response import Response
+
+from api.autocomplete import title_index
+from api.cache import get_cache, response_key
+from api.constants import FACETS_QUERY_PARAM, TITLE_FACETS
+from api.filters import (CommentSearchFilterSet, ReviewSearchFilterSet,
+                         TitleFilterSet, TopTitleFilterSet)
+from api.mixins import (CachedResponseMixin, CategoryGenreMixin,
+                        ConditionalGetMixin, KeysetPaginationMixin,
+                        NestedViewSetMixin, NoPutModelViewSet)
+from api.pagination import (SearchKeysetPagination, TitleKeysetPagination,
+                            TopTitlesPagination)
+from api.serializers import (CategorySerializer, CommentSearchSerializer,
+                             CommentSerializer, GenreSerializer,
+                             ReviewSearchSerializer, ReviewSerializer,
+                             TitleSerializer, TopTitleSerializer)
+from api.slugs import category_slugs, genre_slugs
+from reviews.constants import SCORES
+from reviews.models import (CatalogVersion, Category, Comment, Genre, Review,
+                            Title, score_field)
 from users.permissions import AdminOrReadOnly, AuthorOrStaff
 
 
 class CategoryViewSet(CategoryGenreMixin):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'categories'
 
 
 class GenreViewSet(CategoryGenreMixin):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = 'genres'
 
 
-class TitleViewSet(NoPutModelViewSet):
-    queryset = Title.objects.all().annotate(
-        rating=models.Avg('reviews__score')).order_by('-year')
+class TitleViewSet(ConditionalGetMixin, CachedResponseMixin,
+                   KeysetPaginationMixin, NoPutModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('-year')
     serializer_class = TitleSerializer
     permission_classes = (AdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilterSet
+    keyset_pagination_class = TitleKeysetPagination
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return ('catalog', f'title:{self.kwargs[self.lookup_field]}')
+        return ('titles',)
+
+    def get_version_stamp(self):
+        if self.action == 'retrieve':
+            return Title.objects.filter(
+                pk=self.kwargs[self.lookup_field]
+            ).values_list('version', 'modified').first()
+        return CatalogVersion.objects.stamp()
+
+    def get_facet_names(self):
+        value = self.request.query_params.get(FACETS_QUERY_PARAM, '')
+        names = dict.fromkeys(
+            name.strip() for name in value.split(',') if name.strip()
+        )
+        unknown = [name for name in names if name not in TITLE_FACETS]
+        if unknown:
+            raise ValidationError({FACETS_QUERY_PARAM: [
+                f'Неизвестные фасеты: {", ".join(unknown)}. Доступны: '
+                f'{", ".join(TITLE_FACETS)}.'
+            ]})
+        return tuple(names)
+
+    def get_facets(self, names):
+        if not settings.RESPONSE_CACHE_TIMEOUT:
+            return self.count_facets(names)
+        cache = get_cache()
+        key = response_key(
+            self.request,
+            self.get_cache_namespaces(),
+            params=(*self.filterset_class.base_filters, FACETS_QUERY_PARAM),
+            kind='facets',
+        )
+        facets = cache.get(key)
+        if facets is None:
+            facets = self.count_facets(names)
+            cache.set(key, facets, settings.RESPONSE_CACHE_TIMEOUT)
+        return facets
+
+    def count_facets(self, names):
+        slugs = {'category': category_slugs.slug, 'genre': genre_slugs.slug}
+        facets = {name: {} for name in names}
+        for name, value, count in sorted(
+            self.filter_queryset(Title.objects.all()).facet_counts(names),
+            key=lambda row: (-row[2], row[1]),
+        ):
+            if name in slugs:
+                value = slugs[name](value)
+            facets[name][str(value)] = count
+        return facets
+
+    def list(self, request, *args, **kwargs):
+        self.facet_names = self.get_facet_names()
+        return super().list(request, *args, **kwargs)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.action == 'list' and self.facet_names:
+            response.data['facets'] = self.get_facets(self.facet_names)
+        return response
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        return Response([
+            {
+                'id': title_id,
+                'name': name,
+                'year': year,
+                'rating': int(rating) if rating is not None else None,
+            }
+            for title_id, name, year, rating in title_index.search(
+                request.query_params.get('q', '')
+            )
+        ])
+
+    @action(detail=False, serializer_class=TopTitleSerializer,
+            filterset_class=TopTitleFilterSet)
+    def top(self, request):
+        self._paginator = TopTitlesPagination()
+        page = self.paginate_queryset(self.filter_queryset(
+            self.get_queryset().annotate(
+                top_rating=F('weighted_rating'), top_id=F('pk')
+            )
+        ))
+        return self.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
 
-
-class ReviewViewSet(NoPutModelViewSet):
+    @action(detail=True)
+    def rating(self, request, pk=None):
+        counts = dict(zip(SCORES, get_object_or_404(
+            Title.objects.values_list(*(
+                f'scores__{score_field(score)}' for score in SCORES
+            )),
+            pk=pk
+        )))
+        counts = {score: count or 0 for score, count in counts.items()}
+        total = sum(counts.values())
+        return Response({
+            'count': total,
+            'mean': round(sum(
+                score * count for score, count in counts.items()
+            ) / total, 2) if total else None,
+            'histogram': counts,
+        })
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedViewSetMixin,
+                    NoPutModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, AuthorOrStaff)
 
     def get_title_object(self):
-        return get_object_or_404(Title, pk=self.kwargs['title_id'])
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(Title, pk=self.kwargs['title_id'])
+        return self._title
+
+    get_parent_object = get_title_object
+
+    def get_version_stamp(self):
+        if self.action == 'retrieve':
+            return Review.objects.filter(
+                pk=self.kwargs[self.lookup_field],
+                title_id=self.kwargs['title_id']
+            ).values_list('version', 'modified').first()
+        return Title.objects.filter(
+            pk=self.kwargs['title_id']
+        ).values_list('version', 'modified').first()
 
     def get_queryset(self):
-        return self.get_title_object().reviews.all().select_related('author')
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
+            author_id=self.request.user.pk,
             title=self.get_title_object()
         )
 
 
-class CommentViewSet(NoPutModelViewSet):
+class CommentViewSet(ConditionalGetMixin, NestedViewSetMixin,
+                     NoPutModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, AuthorOrStaff)
 
     def get_review_object(self):
-        title = get_object_or_404(Title, pk=self.kwargs['title_id'])
-        return get_object_or_404(title.reviews.all(),
-                                 pk=self.kwargs['review_id'])
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id']
+            )
+        return self._review
+
+    get_parent_object = get_review_object
+
+    def get_version_stamp(self):
+        return Review.objects.filter(
+            pk=self.kwargs['review_id'],
+            title_id=self.kwargs['title_id']
+        ).values_list('version', 'modified').first()
 
     def get_queryset(self):
-        return self.get_review_object().comments.all().select_related('author')
+        return Comment.objects.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(
-            author=self.request.user,
+            author_id=self.request.user.pk,
             review=self.get_review_object()
         )
+
+
+class ReviewSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    queryset = Review.objects.select_related('author')
+    serializer_class = ReviewSearchSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = ReviewSearchFilterSet
+    pagination_class = SearchKeysetPagination
+
+
+class CommentSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    queryset = Comment.objects.select_related('author', 'review')
+    serializer_class = CommentSearchSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = CommentSearchFilterSet
+    pagination_class = SearchKeysetPagination
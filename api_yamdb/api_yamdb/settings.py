@@ -71,6 +71,33 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Кеш ответов GET-запросов к каталогу; 0 отключает кеширование. Поколения
+# кеша хранятся в нём же, поэтому включать его можно только с общим для всех
+# процессов бэкендом (Redis, Memcached): LocMemCache у каждого воркера свой
+# и не видит изменений, сделанных другими воркерами и командами.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 0
+
+# Индекс автодополнения названий строится в памяти процесса и полностью
+# перестраивается в фоне не реже, чем раз в указанное число секунд.
+AUTOCOMPLETE_REFRESH_INTERVAL = 60 * 10
+
+# Слаги жанров и категорий кешируются в памяти процесса и перечитываются из
+# БД не реже, чем раз в указанное число секунд; слаг, которого нет в памяти,
+# ищется в БД сразу.
+SLUG_MAP_TIMEOUT = 60
+
+# Взвешенный рейтинг для /titles/top/: средняя оценка произведения
+# смешивается со средней по каталогу так, будто у него есть ещё
+# TOP_TITLES_MIN_REVIEWS отзывов со средней оценкой каталога.
+TOP_TITLES_MIN_REVIEWS = 10
+
 AUTH_USER_MODEL = 'users.User'
 
 # Password validation
@@ -117,7 +144,7 @@ DEFAULT_FROM_EMAIL = 'from@example.com'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -129,3 +156,10 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
 }
+
+# Пользователь собирается из claims токена без запроса к БД; роль и
+# активность сверяются с БД не реже, чем раз в JWT_USER_STATE_TIMEOUT секунд.
+JWT_STATELESS_AUTH = True
+JWT_USER_STATE_TIMEOUT = 30
+# Сколько проверенных токенов хранить в памяти процесса; 0 отключает кеш.
+JWT_VERIFIED_TOKEN_CACHE_SIZE = 1024
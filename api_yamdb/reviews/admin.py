@@ -7,6 +7,16 @@ class TitleGenreTabular(admin.TabularInline):
     model = TitleGenre
 
 
+class TextSearchAdminMixin:
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term:
+            results |= queryset.filter(queryset.search_condition(search_term))
+        return results, may_have_duplicates
+
+
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
     list_display = (
@@ -60,7 +70,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(TextSearchAdminMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'score',
@@ -77,7 +87,7 @@ class ReviewAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(TextSearchAdminMixin, admin.ModelAdmin):
     list_display = (
         'review',
         'text',
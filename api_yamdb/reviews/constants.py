@@ -2,6 +2,34 @@ MAX_SCORE = 10
 
 MIN_SCORE = 1
 
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
 TITLE_MAX_LENGTH = 256
 
 TITLE_SHOWING_LENGTH = 30
+
+CSV_FILE_NAMES = {
+    'User': 'users.csv',
+    'Category': 'category.csv',
+    'Genre': 'genre.csv',
+    'Title': 'titles.csv',
+    'GenreTitle': 'genre_title.csv',
+    'Review': 'review.csv',
+    'Comment': 'comments.csv',
+}
+
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+
+TITLE_SEARCH_FIELDS = ('name', 'description')
+
+TITLE_SEARCH_WEIGHTS = (10.0, 1.0)
+
+REVIEW_SEARCH_TABLE = 'reviews_review_fts'
+
+COMMENT_SEARCH_TABLE = 'reviews_comment_fts'
+
+TEXT_SEARCH_FIELDS = ('text',)
+
+SCORE_COUNTS_BATCH_SIZE = 1000
+
+CATALOG_VERSION_ID = 1
@@ -0,0 +1,197 @@
+import time
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.constants import MAX_SCORE, MIN_SCORE, SCORES
+from reviews.models import (CatalogVersion, Review, Title, TitleScores,
+                            score_field)
+from reviews.signals import catalog_changed
+
+
+class Command(BaseCommand):
+    help = ('Проверка сумм оценок, числа отзывов и распределения оценок '
+            'произведений по таблице отзывов с исправлением расхождений')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000000,
+            help='Количество отзывов, читаемых из БД за один раз',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество произведений, сверяемых за один проход',
+        )
+        parser.add_argument(
+            '--examples',
+            type=int,
+            default=10,
+            help='Сколько расхождений вывести подробно',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересчитать счётчики произведений с расхождениями',
+        )
+
+    def handle(self, *args, **options):
+        for option in ('chunk_size', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'Значение --{option.replace("_", "-")} должно быть '
+                    'больше нуля.'
+                )
+        started = time.monotonic()
+        batch_size = options['batch_size']
+        examples = options['examples']
+        drifted = checked = 0
+        totals = np.zeros(MAX_SCORE + 1, dtype=np.int64)
+        fixed_ids = []
+        last_id = 0
+        while True:
+            titles = np.array(
+                Title.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', 'score_sum', 'reviews_count')[:batch_size],
+                dtype=np.int64,
+            ).reshape(-1, 3)
+            if not len(titles):
+                break
+            last_id = int(titles[-1, 0])
+            expected = self.count_scores(titles[:, 0], options['chunk_size'])
+            totals += expected.sum(axis=0)
+            checked += len(titles)
+            drift, messages = self.compare(titles, expected)
+            if options['fix'] and drift.any():
+                fixed, messages = self.fix(
+                    titles[drift, 0], options['chunk_size']
+                )
+                fixed_ids += fixed
+            for message in messages:
+                if drifted < examples:
+                    self.stdout.write(message)
+                drifted += 1
+        reviews_count = int(totals.sum())
+        if fixed_ids:
+            self.update_weighted_ratings(fixed_ids, totals, batch_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Проверено {checked} произведений и {reviews_count} отзывов, '
+            f'расхождений: {drifted}, исправлено: {len(fixed_ids)} за '
+            f'{elapsed:.2f} с'
+        )
+        if drifted and not options['fix']:
+            raise CommandError(
+                'Найдены расхождения в рейтингах, запустите команду с --fix.'
+            )
+
+    def update_weighted_ratings(self, title_ids, totals, batch_size):
+        mean = float(totals @ np.arange(MAX_SCORE + 1)) / max(totals.sum(), 1)
+        CatalogVersion.objects.set_rating_mean(mean)
+        for first in range(0, len(title_ids), batch_size):
+            Title.objects.filter(
+                pk__in=title_ids[first:first + batch_size]
+            ).update_weighted_ratings(mean, settings.TOP_TITLES_MIN_REVIEWS)
+        catalog_changed.send(sender=Title)
+
+    def count_scores(self, title_ids, chunk_size):
+        counts = np.zeros((len(title_ids), MAX_SCORE + 1), dtype=np.int64)
+        reviews = Review.objects.filter(
+            title_id__gte=title_ids[0], title_id__lte=title_ids[-1]
+        ).order_by().values_list('title_id', 'score').iterator(chunk_size)
+        while True:
+            pairs = np.array(
+                list(islice(reviews, chunk_size)), dtype=np.int64
+            ).reshape(-1, 2)
+            if not len(pairs):
+                return counts
+            indexes = np.searchsorted(title_ids, pairs[:, 0])
+            known = (title_ids[np.minimum(indexes, len(title_ids) - 1)]
+                     == pairs[:, 0])
+            keys = indexes[known] * (MAX_SCORE + 1) + pairs[known, 1]
+            counts += np.bincount(keys, minlength=counts.size).reshape(
+                counts.shape
+            )
+
+    def compare(self, titles, expected):
+        title_ids = titles[:, 0]
+        stored = np.zeros_like(expected)
+        rows = TitleScores.objects.filter(
+            pk__gte=title_ids[0], pk__lte=title_ids[-1]
+        ).order_by('pk').values_list(
+            'pk', *(score_field(score) for score in SCORES)
+        )
+        for title_id, *scores in rows:
+            stored[np.searchsorted(title_ids, title_id), MIN_SCORE:] = scores
+        expected_sum = expected @ np.arange(MAX_SCORE + 1)
+        expected_count = expected.sum(axis=1)
+        drift = (
+            (titles[:, 1] != expected_sum)
+            | (titles[:, 2] != expected_count)
+            | (stored != expected).any(axis=1)
+        )
+        messages = []
+        for index in np.flatnonzero(drift):
+            message = f'Произведение {title_ids[index]}:'
+            if titles[index, 1] != expected_sum[index]:
+                message += (f' сумма оценок {titles[index, 1]} вместо '
+                            f'{expected_sum[index]},')
+            if titles[index, 2] != expected_count[index]:
+                message += (f' отзывов {titles[index, 2]} вместо '
+                            f'{expected_count[index]},')
+            if (stored[index] != expected[index]).any():
+                message += (
+                    f' распределение {stored[index, MIN_SCORE:].tolist()} '
+                    f'вместо {expected[index, MIN_SCORE:].tolist()},'
+                )
+            messages.append(message.rstrip(','))
+        return drift, messages
+
+    def fix(self, title_ids, chunk_size):
+        with transaction.atomic():
+            titles = np.array(
+                Title.objects.select_for_update().filter(
+                    pk__in=title_ids.tolist()
+                ).order_by('pk').values_list(
+                    'pk', 'score_sum', 'reviews_count'
+                ),
+                dtype=np.int64,
+            ).reshape(-1, 3)
+            if not len(titles):
+                return [], []
+            expected = self.count_scores(titles[:, 0], chunk_size)
+            drift, messages = self.compare(titles, expected)
+            title_ids = titles[drift, 0].tolist()
+            expected = expected[drift]
+            modified = timezone.now()
+            Title.objects.bulk_update([
+                Title(
+                    pk=title_id,
+                    score_sum=int(score_sum),
+                    reviews_count=int(reviews_count),
+                    version=F('version') + 1,
+                    modified=modified,
+                )
+                for title_id, score_sum, reviews_count in zip(
+                    title_ids,
+                    expected @ np.arange(MAX_SCORE + 1),
+                    expected.sum(axis=1),
+                )
+            ], ('score_sum', 'reviews_count', 'version', 'modified'))
+            TitleScores.objects.filter(pk__in=title_ids).delete()
+            TitleScores.objects.bulk_create([
+                TitleScores(title_id=title_id, **{
+                    score_field(score): int(counts[score]) for score in SCORES
+                })
+                for title_id, counts in zip(title_ids, expected)
+                if counts.any()
+            ])
+        return title_ids, messages
@@ -0,0 +1,133 @@
+import csv
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.constants import CSV_FILE_NAMES
+from reviews.management.commands import import_csv
+
+EXPORT_COLUMNS = {
+    'User': (
+        ('id', 'id'),
+        ('username', 'username'),
+        ('email', 'email'),
+        ('role', 'role'),
+        ('bio', 'bio'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    ),
+    'Category': (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    'Genre': (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    'Title': (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('year', 'year'),
+        ('category', 'category_id'),
+        ('description', 'description'),
+    ),
+    'GenreTitle': (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('genre_id', 'genre_id'),
+    ),
+    'Review': (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    ),
+    'Comment': (
+        ('id', 'id'),
+        ('review_id', 'review_id'),
+        ('text', 'text'),
+        ('author', 'author_id'),
+        ('pub_date', 'pub_date'),
+    ),
+}
+
+FORMATS = ('csv', 'ndjson')
+
+
+class Command(BaseCommand):
+    help = 'Экспорт моделей в CSV или NDJSON файлы в формате static/data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', type=str)
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=list(EXPORT_COLUMNS),
+            default=list(EXPORT_COLUMNS),
+        )
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=import_csv.DEFAULT_BATCH_SIZE,
+            help='Количество строк, читаемых из БД за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for model_name in options['models']:
+            file_name = CSV_FILE_NAMES[model_name]
+            if options['format'] == 'ndjson':
+                file_name = file_name.replace('.csv', '.ndjson')
+            if options['gzip']:
+                file_name += '.gz'
+            path = os.path.join(options['output_dir'], file_name)
+            started = time.monotonic()
+            rows = self.export_model(
+                model_name, path, options['format'], options['chunk_size']
+            )
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Модель {model_name} выгружена в {path}: {rows} строк за '
+                f'{elapsed:.2f} с ({rows / max(elapsed, 1e-6):.0f} строк/с)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Экспорт завершён в {options["output_dir"]}'))
+
+    def export_model(self, model_name, path, file_format, chunk_size):
+        columns, fields = zip(*EXPORT_COLUMNS[model_name])
+        model = import_csv.MODEL_MAPPING[model_name]
+        values = model.objects.order_by('pk').values_list(
+            *fields
+        ).iterator(chunk_size=chunk_size)
+        opener = gzip.open if path.endswith('.gz') else open
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        rows = 0
+        with opener(path, 'wt', newline='', encoding='utf-8') as output:
+            if file_format == 'csv':
+                writer = csv.writer(output)
+                writer.writerow(columns)
+                for row in values:
+                    writer.writerow(self.csv_value(encoder, value)
+                                    for value in row)
+                    rows += 1
+            else:
+                for row in values:
+                    output.write(encoder.encode(dict(zip(columns, row))))
+                    output.write('\n')
+                    rows += 1
+        return rows
+
+    @staticmethod
+    def csv_value(encoder, value):
+        if value is None:
+            return ''
+        if isinstance(value, (str, int)):
+            return value
+        return encoder.default(value)
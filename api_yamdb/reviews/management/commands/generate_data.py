@@ -0,0 +1,279 @@
+import random
+import time
+from math import gcd
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleGenre, TitleScores, score_field)
+
+User = get_user_model()
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'актёр', 'режиссёр',
+    'музыка', 'сцена', 'диалог', 'атмосфера', 'сильный', 'слабый',
+    'неожиданный', 'скучный', 'яркий', 'глубокий', 'смешной', 'мрачный',
+    'классика', 'шедевр', 'провал', 'рекомендую', 'пересматривал', 'жаль',
+)
+
+
+def scale(value):
+    return int(float(value))
+
+
+def zipf_rank(rng, size, exponent):
+    uniform = rng.random()
+    if exponent == 1:
+        rank = size ** uniform
+    else:
+        power = 1 - exponent
+        rank = ((size ** power - 1) * uniform + 1) ** (1 / power)
+    return min(int(rank), size) - 1
+
+
+def zipf_counts(total, size, exponent, cap):
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    counts = [0] * size
+    remaining = total
+    while remaining:
+        free = [index for index in range(size) if counts[index] < cap]
+        if not free:
+            raise CommandError(
+                'Недостаточно пользователей: у каждого произведения может '
+                'быть не больше одного отзыва от пользователя.'
+            )
+        free_weight = sum(weights[index] for index in free)
+        added = 0
+        for index in free:
+            extra = min(
+                cap - counts[index],
+                int(remaining * weights[index] / free_weight)
+            )
+            counts[index] += extra
+            added += extra
+        if not added:
+            for index in free[:remaining]:
+                counts[index] += 1
+        remaining = total - sum(counts)
+    return counts
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = ('Генерация большого синтетического набора данных с '
+            'распределением Ципфа для нагрузочных тестов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=scale, default=10 ** 4)
+        parser.add_argument('--titles', type=scale, default=1000)
+        parser.add_argument('--users', type=scale, default=2000)
+        parser.add_argument(
+            '--comments',
+            type=scale,
+            help='Количество комментариев, по умолчанию половина отзывов',
+        )
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument(
+            '--max-genres',
+            type=int,
+            default=5,
+            help='Максимальное количество жанров у произведения',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for option in ('titles', 'users', 'categories', 'genres',
+                       'max_genres', 'batch_size'):
+            if options[option] < 1:
+                raise CommandError(f'Значение --{option} должно быть больше '
+                                   'нуля.')
+        if options['comments'] is None:
+            options['comments'] = options['reviews'] // 2
+        for option in ('reviews', 'comments'):
+            if options[option] < 0:
+                raise CommandError(f'Значение --{option} не может быть '
+                                   'отрицательным.')
+        if options['zipf'] <= 0:
+            raise CommandError('Значение --zipf должно быть больше нуля.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.exponent = options['zipf']
+        started = time.monotonic()
+        review_counts = zipf_counts(
+            options['reviews'],
+            options['titles'],
+            self.exponent,
+            options['users'],
+        )
+        self.rng.shuffle(review_counts)
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'])
+            category_ids = self.create_named(Category, options['categories'])
+            genre_ids = self.create_named(Genre, options['genres'])
+            first_review_id = next_id(Review)
+            self.create_titles(
+                review_counts,
+                user_ids,
+                category_ids,
+                genre_ids,
+                options['max_genres'],
+            )
+            self.create_comments(
+                options['comments'],
+                first_review_id,
+                options['reviews'],
+                user_ids,
+            )
+        call_command('update_weighted_ratings', stdout=self.stdout)
+        elapsed = time.monotonic() - started
+        rows = (options['users'] + options['titles'] + options['reviews']
+                + options['comments'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сгенерировано строк: {rows} за {elapsed:.2f} с '
+            f'({rows / max(elapsed, 1e-6):.0f} строк/с)'
+        ))
+
+    def flush(self, model, objects, force=False):
+        if objects and (force or len(objects) >= self.batch_size):
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            objects.clear()
+
+    def text(self, prefix):
+        words = self.rng.choices(WORDS, k=self.rng.randint(5, 30))
+        return f'{prefix}: {" ".join(words)}'
+
+    def create_users(self, count):
+        first_id = next_id(User)
+        password = make_password(None)
+        users = []
+        for user_id in range(first_id, first_id + count):
+            users.append(User(
+                id=user_id,
+                username=f'generated_{user_id}',
+                email=f'generated_{user_id}@yamdb.fake',
+                password=password,
+            ))
+            self.flush(User, users)
+        self.flush(User, users, force=True)
+        self.stdout.write(f'Пользователей: {count}')
+        return range(first_id, first_id + count)
+
+    def create_named(self, model, count):
+        first_id = next_id(model)
+        model.objects.bulk_create(
+            [model(id=object_id,
+                   name=f'{model._meta.verbose_name} {object_id}',
+                   slug=f'generated-{model.__name__.lower()}-{object_id}')
+             for object_id in range(first_id, first_id + count)],
+            batch_size=self.batch_size,
+        )
+        return range(first_id, first_id + count)
+
+    def create_titles(self, review_counts, user_ids, category_ids, genre_ids,
+                      max_genres):
+        rng = self.rng
+        first_id = next_id(Title)
+        review_id = next_id(Review)
+        titles, title_genres, title_scores, reviews = [], [], [], []
+        for title_id, reviews_count in enumerate(review_counts, first_id):
+            quality = rng.gauss(7, 1.5)
+            first_author = rng.randrange(len(user_ids))
+            score_sum = 0
+            score_counts = {}
+            for number in range(reviews_count):
+                score = min(MAX_SCORE, max(
+                    MIN_SCORE, round(rng.gauss(quality, 1.5))
+                ))
+                score_sum += score
+                field = score_field(score)
+                score_counts[field] = score_counts.get(field, 0) + 1
+                reviews.append(Review(
+                    id=review_id,
+                    title_id=title_id,
+                    author_id=user_ids[
+                        (first_author + number) % len(user_ids)
+                    ],
+                    score=score,
+                    text=self.text(f'Отзыв {review_id}'),
+                ))
+                review_id += 1
+                self.flush(Review, reviews)
+            titles.append(Title(
+                id=title_id,
+                name=f'Произведение {title_id}',
+                year=rng.randint(1900, 2020),
+                description=self.text('Описание'),
+                category_id=category_ids[
+                    zipf_rank(rng, len(category_ids), self.exponent)
+                ],
+                score_sum=score_sum,
+                reviews_count=reviews_count,
+            ))
+            if score_counts:
+                title_scores.append(
+                    TitleScores(title_id=title_id, **score_counts)
+                )
+            genres = {
+                genre_ids[zipf_rank(rng, len(genre_ids), self.exponent)]
+                for _ in range(rng.randint(1, max_genres))
+            }
+            title_genres.extend(
+                TitleGenre(title_id=title_id, genre_id=genre_id)
+                for genre_id in genres
+            )
+            self.flush(Title, titles)
+            self.flush(TitleGenre, title_genres)
+            self.flush(TitleScores, title_scores)
+        self.flush(Title, titles, force=True)
+        self.flush(TitleGenre, title_genres, force=True)
+        self.flush(TitleScores, title_scores, force=True)
+        self.flush(Review, reviews, force=True)
+        self.stdout.write(
+            f'Произведений: {len(review_counts)}, '
+            f'отзывов: {sum(review_counts)}'
+        )
+
+    def create_comments(self, count, first_review_id, reviews_count,
+                        user_ids):
+        if not reviews_count:
+            return
+        rng = self.rng
+        step = self.coprime_step(reviews_count)
+        offset = rng.randrange(reviews_count)
+        comments = []
+        for _ in range(count):
+            rank = zipf_rank(rng, reviews_count, self.exponent)
+            review_id = first_review_id + (
+                rank * step + offset
+            ) % reviews_count
+            comments.append(Comment(
+                review_id=review_id,
+                author_id=rng.choice(user_ids),
+                text=self.text('Комментарий'),
+            ))
+            self.flush(Comment, comments)
+        self.flush(Comment, comments, force=True)
+        self.stdout.write(f'Комментариев: {count}')
+
+    def coprime_step(self, size):
+        step = self.rng.randrange(1, size + 1)
+        while gcd(step, size) != 1:
+            step += 1
+        return step
@@ -1,12 +1,156 @@
 import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
 
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
 
+from reviews.constants import CSV_FILE_NAMES
 from reviews.models import Category, Comment, Genre, Review, Title, TitleGenre
+from reviews.signals import catalog_changed
 
 User = get_user_model()
 
+MODEL_MAPPING = {
+    'Category': Category,
+    'Genre': Genre,
+    'Title': Title,
+    'GenreTitle': TitleGenre,
+    'Review': Review,
+    'Comment': Comment,
+    'User': User,
+}
+
+FOREIGN_KEY_COLUMNS = {
+    'category': Category,
+    'author': User,
+}
+
+RATING_MODELS = ('Title', 'GenreTitle', 'Review')
+
+DEFAULT_BATCH_SIZE = 1000
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+
+def open_csv(csv_file_path, mode='rt'):
+    opener = gzip.open if csv_file_path.endswith('.gz') else open
+    if 'b' in mode:
+        return opener(csv_file_path, mode)
+    return opener(csv_file_path, mode, newline='', encoding='utf-8')
+
+
+def find_csv(data_dir, file_name):
+    for path in (os.path.join(data_dir, file_name),
+                 os.path.join(data_dir, file_name + '.gz')):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_csv(csv_file_path):
+    with open_csv(csv_file_path) as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+class TrackedLines:
+    def __init__(self, binary_file):
+        self.file = binary_file
+        self.offset = binary_file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.file.readline()
+        if not line:
+            raise StopIteration
+        self.offset = self.file.tell()
+        return line.decode('utf-8')
+
+
+def read_csv_chunks(csv_file_path, chunk_size, offset=None):
+    with open_csv(csv_file_path, 'rb') as binary_file:
+        header = binary_file.readline().decode('utf-8')
+        if offset is not None:
+            binary_file.seek(offset)
+        lines = TrackedLines(binary_file)
+        reader = csv.DictReader(
+            lines, fieldnames=next(csv.reader([header]))
+        )
+        for chunk in iter(lambda: list(islice(reader, chunk_size)), []):
+            yield chunk, lines.offset
+
+
+@lru_cache(maxsize=None)
+def column_fields(model):
+    return {
+        name: field
+        for field in model._meta.concrete_fields
+        for name in (field.name, field.attname)
+    }
+
+
+def clean_row(model, row):
+    for column, field in column_fields(model).items():
+        value = row.get(column)
+        if getattr(field, 'auto_now_add', False):
+            if not value and column == field.name:
+                row[column] = timezone.now()
+        elif value == '' and field.null:
+            row[column] = None
+    return row
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def dependency_order(model_mapping):
+    names = {model: name for name, model in model_mapping.items()}
+    dependencies = {
+        name: {
+            names[field.related_model] for field in model._meta.get_fields()
+            if field.many_to_one and field.concrete
+            and field.related_model in names
+            and field.related_model is not model
+        }
+        for name, model in model_mapping.items()
+    }
+    ordered = []
+    while dependencies:
+        ready = [name for name, required in dependencies.items()
+                 if not required - set(ordered)]
+        if not ready:
+            raise CommandError(
+                'Циклическая зависимость между моделями: '
+                f'{", ".join(dependencies)}'
+            )
+        for name in ready:
+            ordered.append(name)
+            del dependencies[name]
+    return ordered
+
 
 class Command(BaseCommand):
     help = 'Импорт CSV файла в соответствующую модель'
@@ -15,30 +159,106 @@ class Command(BaseCommand):
         parser.add_argument(
             'model',
             type=str,
-            choices=['Category', 'Comment', 'Genre',
-                     'GenreTitle', 'Review', 'Title', 'User']
+            nargs='?',
+            choices=list(MODEL_MAPPING)
+        )
+        parser.add_argument('csv_path', type=str, nargs='?')
+        parser.add_argument(
+            '--all',
+            dest='data_dir',
+            metavar='DIR',
+            help=('Импортировать все файлы из каталога в порядке '
+                  'зависимостей моделей в одной транзакции'),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help=('Импортировать пачками указанного размера через '
+                  'bulk_create в одной транзакции'),
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help=('Читать файл пачками и фиксировать каждую пачку '
+                  'отдельной транзакцией с сохранением контрольной точки'),
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить потоковый импорт с сохранённой контрольной точки',
+        )
+        parser.add_argument(
+            '--progress-interval',
+            type=float,
+            default=5,
+            help='Интервал вывода прогресса потокового импорта в секундах',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов для разбора файлов в режиме --all',
         )
-        parser.add_argument('csv_path', type=str)
 
     def handle(self, *args, **options):
+        try:
+            self.import_data(options)
+        finally:
+            catalog_changed.send(sender=Title)
+
+    def import_data(self, options):
+        batch_size = options['batch_size']
+        if batch_size is not None and batch_size < 1:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        if options['workers'] < 1:
+            raise CommandError('Число процессов должно быть больше нуля.')
+        stream = options['stream'] or options['resume']
+        if options['data_dir']:
+            if options['model'] or options['csv_path'] or stream:
+                raise CommandError(
+                    'С параметром --all модель, файл и потоковый режим '
+                    'не указываются.'
+                )
+            self.import_all(
+                options['data_dir'],
+                batch_size or DEFAULT_BATCH_SIZE,
+                options['workers'],
+            )
+            self.update_weighted_ratings()
+            return
+        if not options['model'] or not options['csv_path']:
+            raise CommandError('Укажите модель и путь к CSV файлу.')
+
         csv_file_path = options['csv_path']
         model_name = options['model']
+        model = MODEL_MAPPING[model_name]
 
-        model_mapping = {
-            'Category': Category,
-            'Genre': Genre,
-            'Title': Title,
-            'GenreTitle': TitleGenre,
-            'Review': Review,
-            'Comment': Comment,
-            'User': User,
-        }
+        if stream:
+            self.import_streaming(
+                model,
+                csv_file_path,
+                batch_size or DEFAULT_BATCH_SIZE,
+                options['resume'],
+                options['progress_interval'],
+            )
+        elif batch_size is not None:
+            self.import_batched(model, csv_file_path, batch_size)
+        else:
+            self.import_rows(model, csv_file_path)
+        if model_name in RATING_MODELS:
+            self.update_weighted_ratings()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Модель {model_name} импортирована в БД из {csv_file_path}'))
 
-        model = model_mapping[model_name]
+    def update_weighted_ratings(self):
+        call_command('update_weighted_ratings', stdout=self.stdout)
 
-        with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
+    def import_rows(self, model, csv_file_path):
+        with open_csv(csv_file_path) as csvfile, keep_auto_now_add(model):
             reader = csv.DictReader(csvfile)
             for row in reader:
+                row = clean_row(model, row)
                 category_id = row.pop('category', None)
                 if category_id:
                     category = Category.objects.get(id=category_id)
@@ -49,5 +269,139 @@ class Command(BaseCommand):
                     row['author'] = author
                 model.objects.create(**row)
 
+    def import_batched(self, model, csv_file_path, batch_size):
+        started = time.monotonic()
+        with open_csv(csv_file_path) as csvfile, transaction.atomic():
+            created = self.insert_rows(
+                model, csv.DictReader(csvfile), batch_size, {}
+            )
+            if model is Review:
+                Title.objects.update_ratings()
+        self.report_speed(created, time.monotonic() - started)
+
+    def import_streaming(self, model, csv_file_path, batch_size, resume,
+                         progress_interval):
+        checkpoint_path = csv_file_path + CHECKPOINT_SUFFIX
+        checkpoint = {'model': model.__name__, 'offset': None, 'rows': 0}
+        if resume:
+            if not os.path.isfile(checkpoint_path):
+                raise CommandError(
+                    f'Контрольная точка {checkpoint_path} не найдена.'
+                )
+            with open(checkpoint_path, encoding='utf-8') as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            if checkpoint['model'] != model.__name__:
+                raise CommandError(
+                    f'Контрольная точка {checkpoint_path} относится к модели '
+                    f'{checkpoint["model"]}.'
+                )
+            self.stdout.write(
+                f'Продолжение импорта со строки {checkpoint["rows"]} '
+                f'(байт {checkpoint["offset"]})'
+            )
+        file_size = os.path.getsize(csv_file_path)
+        if csv_file_path.endswith('.gz'):
+            file_size = 'неизвестно (gzip)'
+        id_maps = {}
+        created = 0
+        started = reported = time.monotonic()
+        for chunk, offset in read_csv_chunks(
+                csv_file_path, batch_size, checkpoint['offset']):
+            # Пачка после контрольной точки могла быть зафиксирована
+            # перед сбоем, поэтому при продолжении повторы пропускаются.
+            with transaction.atomic():
+                created += self.insert_rows(
+                    model, chunk, batch_size, id_maps, ignore_conflicts=resume
+                )
+            resume = False
+            checkpoint['offset'] = offset
+            checkpoint['rows'] += len(chunk)
+            self.save_checkpoint(checkpoint_path, checkpoint)
+            if time.monotonic() - reported >= progress_interval:
+                reported = time.monotonic()
+                self.stdout.write(
+                    f'Строк: {checkpoint["rows"]}, байт: {offset} '
+                    f'из {file_size}, '
+                    f'{created / max(reported - started, 1e-6):.0f} строк/с'
+                )
+        if model is Review:
+            Title.objects.update_ratings()
+        if os.path.isfile(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.report_speed(created, time.monotonic() - started)
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        temporary_path = checkpoint_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temporary_path, checkpoint_path)
+
+    def import_all(self, data_dir, batch_size, workers):
+        paths = {
+            name: find_csv(data_dir, CSV_FILE_NAMES[name])
+            for name in dependency_order(MODEL_MAPPING)
+        }
+        order = [name for name, path in paths.items() if path]
+        if not order:
+            raise CommandError(f'В каталоге {data_dir} нет CSV файлов.')
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = {
+                name: executor.submit(read_csv, paths[name])
+                for name in order
+            }
+            parsed = {name: future.result() for name, future in parsed.items()}
+        id_maps = {}
+        created = 0
+        with transaction.atomic():
+            for name in order:
+                created += self.insert_rows(
+                    MODEL_MAPPING[name], parsed.pop(name), batch_size, id_maps
+                )
+                self.stdout.write(
+                    f'Модель {name} импортирована из {paths[name]}'
+                )
+            if 'Review' in order:
+                Title.objects.update_ratings()
+        self.report_speed(created, time.monotonic() - started)
         self.stdout.write(self.style.SUCCESS(
-            f'Модель {model_name} импортирована в БД из {csv_file_path}'))
+            f'Все модели импортированы в БД из {data_dir}'))
+
+    def insert_rows(self, model, rows, batch_size, id_maps,
+                    ignore_conflicts=False):
+        created = 0
+        rows = iter(rows)
+        with keep_auto_now_add(model):
+            for chunk in iter(lambda: list(islice(rows, batch_size)), []):
+                model.objects.bulk_create(
+                    [model(**self.resolve_foreign_keys(
+                        clean_row(model, row), id_maps
+                    )) for row in chunk],
+                    batch_size=batch_size,
+                    ignore_conflicts=ignore_conflicts,
+                )
+                created += len(chunk)
+        return created
+
+    def resolve_foreign_keys(self, row, id_maps):
+        for column, related_model in FOREIGN_KEY_COLUMNS.items():
+            related_id = row.pop(column, None)
+            if not related_id:
+                continue
+            if column not in id_maps:
+                id_maps[column] = set(
+                    related_model.objects.values_list('pk', flat=True)
+                )
+            related_id = int(related_id)
+            if related_id not in id_maps[column]:
+                raise CommandError(
+                    f'{related_model.__name__} с id={related_id} не найден.'
+                )
+            row[f'{column}_id'] = related_id
+        return row
+
+    def report_speed(self, rows, elapsed):
+        self.stdout.write(
+            f'Импортировано строк: {rows} за {elapsed:.2f} с '
+            f'({rows / max(elapsed, 1e-6):.0f} строк/с)'
+        )
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Sum
+
+from reviews.models import CatalogVersion, Title
+from reviews.signals import catalog_changed
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт взвешенного рейтинга произведений для /titles/top/ '
+            'пачками по диапазонам id')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять пересчёт каждые N секунд, 0 - выполнить один раз',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Значение --batch-size должно быть больше '
+                               'нуля.')
+        if settings.TOP_TITLES_MIN_REVIEWS < 1:
+            raise CommandError('TOP_TITLES_MIN_REVIEWS должно быть больше '
+                               'нуля.')
+        while True:
+            self.recompute(options['batch_size'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def recompute(self, batch_size):
+        started = time.monotonic()
+        totals = Title.objects.aggregate(
+            score_sum=Sum('score_sum'),
+            reviews_count=Sum('reviews_count'),
+            last_id=Max('pk'),
+        )
+        mean = 0
+        if totals['reviews_count']:
+            mean = totals['score_sum'] / totals['reviews_count']
+        CatalogVersion.objects.set_rating_mean(mean)
+        updated = 0
+        for first_id in range(0, (totals['last_id'] or 0) + 1, batch_size):
+            with transaction.atomic():
+                updated += Title.objects.filter(
+                    pk__gte=first_id, pk__lt=first_id + batch_size
+                ).update_weighted_ratings(
+                    mean, settings.TOP_TITLES_MIN_REVIEWS
+                )
+        catalog_changed.send(sender=Title)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Взвешенный рейтинг пересчитан для {updated} произведений '
+            f'(средняя оценка {mean:.2f}) за {elapsed:.2f} с'
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 22:10
+
+from django.db import migrations
+
+from reviews.constants import TITLE_SEARCH_FIELDS, TITLE_SEARCH_TABLE
+from reviews.search import create_fts_sql, drop_fts_sql
+
+
+def create_title_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in create_fts_sql(
+            TITLE_SEARCH_TABLE, 'reviews_title', TITLE_SEARCH_FIELDS):
+        schema_editor.execute(statement)
+
+
+def drop_title_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in drop_fts_sql(TITLE_SEARCH_TABLE):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_version_stamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_title_search, drop_title_search),
+    ]
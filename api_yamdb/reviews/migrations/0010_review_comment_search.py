@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-18 22:40
+
+from django.db import migrations
+
+from reviews.constants import (COMMENT_SEARCH_TABLE, REVIEW_SEARCH_TABLE,
+                               TEXT_SEARCH_FIELDS)
+from reviews.search import create_fts_sql, drop_fts_sql
+
+SEARCH_TABLES = (
+    (REVIEW_SEARCH_TABLE, 'reviews_review'),
+    (COMMENT_SEARCH_TABLE, 'reviews_comment'),
+)
+
+
+def create_text_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, content_table in SEARCH_TABLES:
+        for statement in create_fts_sql(
+                table, content_table, TEXT_SEARCH_FIELDS):
+            schema_editor.execute(statement)
+
+
+def drop_text_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, _ in SEARCH_TABLES:
+        for statement in drop_fts_sql(table):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_text_search, drop_text_search),
+    ]
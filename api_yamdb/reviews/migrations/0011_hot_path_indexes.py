@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 20:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def delete_duplicate_title_genres(apps, schema_editor):
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    first_ids = TitleGenre.objects.values('title', 'genre').annotate(
+        first_id=models.Min('id')
+    ).values('first_id')
+    TitleGenre.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_review_comment_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_title_genres, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='genre',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='titlegenre',
+            name='title',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date'], name='review_title_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-year', 'id'], name='title_category_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre', 'title'], name='titlegenre_genre_title_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titlegenre',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='title_genre_uniqueness'),
+        ),
+    ]
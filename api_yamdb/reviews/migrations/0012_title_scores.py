@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-18 20:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_title_scores(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleScores = apps.get_model('reviews', 'TitleScores')
+    counts = Review.objects.order_by().values('title').annotate(**{
+        f'score_{score}': models.Count('pk', filter=models.Q(score=score))
+        for score in range(1, 11)
+    })
+    TitleScores.objects.bulk_create(
+        (TitleScores(title_id=row.pop('title'), **row) for row in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScores',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scores', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Оценок 10')),
+            ],
+            options={
+                'verbose_name': 'распределение оценок',
+                'verbose_name_plural': 'Распределения оценок',
+            },
+        ),
+        migrations.RunPython(fill_title_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2 on 2026-10-18 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+from reviews.constants import TITLE_SEARCH_FIELDS, TITLE_SEARCH_TABLE
+from reviews.search import create_fts_sql, drop_fts_sql
+
+
+def recreate_title_search(apps, schema_editor):
+    # SQLite rebuilds reviews_title to add a column and drops its triggers.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in drop_fts_sql(TITLE_SEARCH_TABLE) + create_fts_sql(
+            TITLE_SEARCH_TABLE, 'reviews_title', TITLE_SEARCH_FIELDS):
+        schema_editor.execute(statement)
+
+
+def fill_weighted_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenre = apps.get_model('reviews', 'TitleGenre')
+    totals = Title.objects.aggregate(
+        score_sum=models.Sum('score_sum'),
+        reviews_count=models.Sum('reviews_count'),
+    )
+    if not totals['reviews_count']:
+        return
+    mean = totals['score_sum'] / totals['reviews_count']
+    min_reviews = settings.TOP_TITLES_MIN_REVIEWS
+    Title.objects.update(weighted_rating=(
+        Cast('score_sum', models.FloatField()) + mean * min_reviews
+    ) / (models.F('reviews_count') + min_reviews))
+    TitleGenre.objects.update(weighted_rating=models.Subquery(
+        Title.objects.filter(
+            pk=models.OuterRef('title')
+        ).values('weighted_rating')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_scores'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_title_search),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(default=0, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='titlegenre',
+            name='weighted_rating',
+            field=models.FloatField(default=0, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-weighted_rating', 'id'], name='title_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-weighted_rating', 'id'], name='title_category_weighted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titlegenre',
+            index=models.Index(fields=['genre', '-weighted_rating', 'title'], name='titlegenre_genre_weighted_idx'),
+        ),
+        migrations.RunPython(recreate_title_search, migrations.RunPython.noop),
+        migrations.RunPython(fill_weighted_ratings, migrations.RunPython.noop),
+    ]
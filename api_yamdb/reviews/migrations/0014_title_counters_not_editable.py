@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_weighted_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(default=0, editable=False, verbose_name='Взвешенный рейтинг'),
+        ),
+    ]
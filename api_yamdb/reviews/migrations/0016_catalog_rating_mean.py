@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 21:33
+
+from django.db import migrations, models
+
+
+def fill_rating_mean(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    CatalogVersion = apps.get_model('reviews', 'CatalogVersion')
+    totals = Title.objects.aggregate(
+        score_sum=models.Sum('score_sum'),
+        reviews_count=models.Sum('reviews_count'),
+    )
+    if totals['reviews_count']:
+        CatalogVersion.objects.update_or_create(pk=1, defaults={
+            'rating_mean': totals['score_sum'] / totals['reviews_count']
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogversion',
+            name='rating_mean',
+            field=models.FloatField(default=0, verbose_name='Средняя оценка каталога'),
+        ),
+        migrations.RunPython(fill_rating_mean, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 21:48
+
+from django.db import migrations, models
+
+from reviews.constants import TITLE_SEARCH_FIELDS, TITLE_SEARCH_TABLE
+from reviews.search import create_fts_sql, drop_fts_sql
+
+
+def recreate_title_search(apps, schema_editor):
+    # SQLite rebuilds reviews_title to alter a column and drops its triggers.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in drop_fts_sql(TITLE_SEARCH_TABLE) + create_fts_sql(
+            TITLE_SEARCH_TABLE, 'reviews_title', TITLE_SEARCH_FIELDS):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_catalog_rating_mean'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_title_search),
+        migrations.AlterField(
+            model_name='title',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(recreate_title_search, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,16 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
 
 from reviews.abstract_models import (CategoryGenreModel, CommentReviewModel)
-from reviews.constants import (MAX_SCORE, MIN_SCORE, TITLE_MAX_LENGTH,
-                               TITLE_SHOWING_LENGTH)
+from reviews.constants import (CATALOG_VERSION_ID, COMMENT_SEARCH_TABLE,
+                               MAX_SCORE, MIN_SCORE, REVIEW_SEARCH_TABLE,
+                               SCORE_COUNTS_BATCH_SIZE, SCORES,
+                               TEXT_SEARCH_FIELDS, TITLE_MAX_LENGTH,
+                               TITLE_SEARCH_FIELDS, TITLE_SEARCH_TABLE,
+                               TITLE_SEARCH_WEIGHTS, TITLE_SHOWING_LENGTH)
+from reviews.search import full_text_match, full_text_search
 from reviews.validators import validate_year
 
 
@@ -19,6 +26,202 @@ class Genre(CategoryGenreModel):
         verbose_name_plural = 'Жанры'
 
 
+COUNTER_FIELDS = ('score_sum', 'reviews_count', 'weighted_rating', 'version')
+
+
+def score_field(score):
+    return f'score_{score}'
+
+
+def counter_change(field, delta):
+    delta = int(delta)
+    if delta >= 0:
+        return models.F(field) + delta
+    return Greatest(models.F(field) + delta, 0)
+
+
+class VersionedQuerySet(models.QuerySet):
+    def touch(self, **fields):
+        return self.update(
+            version=models.F('version') + 1,
+            modified=timezone.now(),
+            **fields
+        )
+
+
+def bump_catalog_version():
+    versions = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID)
+    if not versions.touch():
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_ID)
+
+
+class CatalogVersionQuerySet(VersionedQuerySet):
+    def bump(self):
+        connection = transaction.get_connection(self.db)
+        if not any(callback is bump_catalog_version
+                   for _, callback in connection.run_on_commit):
+            transaction.on_commit(bump_catalog_version, self.db)
+
+    def stamp(self):
+        stamp = self.filter(pk=CATALOG_VERSION_ID).values_list(
+            'version', 'modified'
+        ).first()
+        if stamp is None:
+            catalog, _ = self.get_or_create(pk=CATALOG_VERSION_ID)
+            stamp = catalog.version, catalog.modified
+        return stamp
+
+    def rating_mean(self):
+        return self.filter(pk=CATALOG_VERSION_ID).values_list(
+            'rating_mean', flat=True
+        ).first() or 0
+
+    def set_rating_mean(self, mean):
+        if not self.filter(pk=CATALOG_VERSION_ID).update(rating_mean=mean):
+            self.get_or_create(
+                pk=CATALOG_VERSION_ID, defaults={'rating_mean': mean}
+            )
+
+
+class ReviewQuerySet(VersionedQuerySet):
+    def search(self, text):
+        return full_text_search(
+            self, REVIEW_SEARCH_TABLE, text, (), TEXT_SEARCH_FIELDS
+        )
+
+    def search_condition(self, text):
+        return full_text_match(
+            self, REVIEW_SEARCH_TABLE, text, TEXT_SEARCH_FIELDS
+        )
+
+
+class CommentQuerySet(models.QuerySet):
+    def search(self, text):
+        return full_text_search(
+            self, COMMENT_SEARCH_TABLE, text, (), TEXT_SEARCH_FIELDS
+        )
+
+    def search_condition(self, text):
+        return full_text_match(
+            self, COMMENT_SEARCH_TABLE, text, TEXT_SEARCH_FIELDS
+        )
+
+
+class TitleQuerySet(VersionedQuerySet):
+    def touch(self, **fields):
+        touched = super().touch(**fields)
+        if touched:
+            CatalogVersion.objects.bump()
+        return touched
+
+    def search(self, text):
+        return full_text_search(
+            self,
+            TITLE_SEARCH_TABLE,
+            text,
+            TITLE_SEARCH_WEIGHTS,
+            TITLE_SEARCH_FIELDS,
+        )
+
+    def facet_counts(self, facets):
+        fields = {
+            'category': 'category_id',
+            'genre': 'titlegenre__genre_id',
+            'year': 'year',
+        }
+        groups = [
+            self.order_by().filter(**{
+                f'{fields[facet]}__isnull': False
+            }).values(
+                facet=models.Value(facet, models.CharField()),
+                value=models.F(fields[facet]),
+            ).annotate(count=models.Count('pk'))
+            for facet in facets
+        ]
+        if not groups:
+            return []
+        return groups[0].union(*groups[1:], all=True).values_list(
+            'facet', 'value', 'count'
+        )
+
+    def update_weighted_ratings(self, mean, min_reviews):
+        updated = self.update(weighted_rating=(
+            Cast('score_sum', models.FloatField()) + mean * min_reviews
+        ) / (models.F('reviews_count') + min_reviews))
+        TitleGenre.objects.filter(title__in=self).copy_weighted_ratings()
+        return updated
+
+    def update_ratings(self):
+        reviews = Review.objects.filter(
+            title=models.OuterRef('pk')
+        ).order_by().values('title')
+        TitleScores.objects.rebuild(self)
+        return self.update(
+            score_sum=Coalesce(models.Subquery(
+                reviews.annotate(total=models.Sum('score')).values('total')
+            ), 0),
+            reviews_count=Coalesce(models.Subquery(
+                reviews.annotate(total=models.Count('pk')).values('total')
+            ), 0),
+        )
+
+
+class TitleScoresQuerySet(models.QuerySet):
+    def change(self, title_id, added=None, removed=None):
+        if added == removed:
+            return
+        changes = {}
+        for score, delta in ((added, 1), (removed, -1)):
+            if score is not None:
+                field = score_field(score)
+                changes[field] = counter_change(field, delta)
+        scores = self.filter(pk=title_id)
+        if not scores.update(**changes) and removed is None:
+            self.bulk_create(
+                [self.model(title_id=title_id)], ignore_conflicts=True
+            )
+            scores.update(**changes)
+
+    def rebuild(self, titles):
+        self.filter(title__in=titles).delete()
+        counts = Review.objects.filter(
+            title__in=titles
+        ).order_by().values('title').annotate(**{
+            score_field(score): models.Count(
+                'pk', filter=models.Q(score=score)
+            )
+            for score in SCORES
+        })
+        self.bulk_create(
+            (self.model(title_id=row.pop('title'), **row) for row in counts),
+            batch_size=SCORE_COUNTS_BATCH_SIZE,
+        )
+
+
+class CatalogVersion(models.Model):
+    version = models.PositiveIntegerField('Версия', default=0)
+    modified = models.DateTimeField('Дата изменения', default=timezone.now)
+    rating_mean = models.FloatField('Средняя оценка каталога', default=0)
+
+    objects = CatalogVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'версия каталога'
+        verbose_name_plural = 'Версии каталога'
+
+    def __str__(self):
+        return str(self.version)
+
+
+class TitleGenreQuerySet(models.QuerySet):
+    def copy_weighted_ratings(self):
+        return self.update(weighted_rating=models.Subquery(
+            Title.objects.filter(
+                pk=models.OuterRef('title')
+            ).values('weighted_rating')
+        ))
+
+
 class Title(models.Model):
     name = models.CharField('Название', max_length=TITLE_MAX_LENGTH)
     year = models.SmallIntegerField(
@@ -42,33 +245,134 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория',
     )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False
+    )
+    weighted_rating = models.FloatField(
+        'Взвешенный рейтинг',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False
+    )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-year',)
+        indexes = (
+            models.Index(fields=('-year', 'id'), name='title_year_id_idx'),
+            models.Index(
+                fields=('category', '-year', 'id'),
+                name='title_category_year_idx'
+            ),
+            models.Index(
+                fields=('-weighted_rating', 'id'),
+                name='title_weighted_rating_idx'
+            ),
+            models.Index(
+                fields=('category', '-weighted_rating', 'id'),
+                name='title_category_weighted_idx'
+            ),
+        )
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return self.name[:TITLE_SHOWING_LENGTH]
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if update_fields is None and not self._state.adding:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+    @property
+    def rating(self):
+        if not self.reviews_count:
+            return None
+        return self.score_sum / self.reviews_count
+
     def get_genres(self):
         return ', '.join([genre.name for genre in self.genre.all()])
     get_genres.short_description = 'Жанры'
 
 
+class TitleScores(models.Model):
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='scores',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+
+    objects = TitleScoresQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return str(self.title_id)
+
+
 class TitleGenre(models.Model):
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Произведение'
     )
     genre = models.ForeignKey(
         Genre,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Жанр'
     )
+    weighted_rating = models.FloatField('Взвешенный рейтинг', default=0)
+
+    objects = TitleGenreQuerySet.as_manager()
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'genre'],
+                                    name='title_genre_uniqueness'),
+        ]
+        indexes = (
+            models.Index(
+                fields=('genre', 'title'),
+                name='titlegenre_genre_title_idx'
+            ),
+            models.Index(
+                fields=('genre', '-weighted_rating', 'title'),
+                name='titlegenre_genre_weighted_idx'
+            ),
+        )
         verbose_name = 'жанр произведения'
         verbose_name_plural = 'Жанры произведений'
 
@@ -92,16 +396,33 @@ class Review(CommentReviewModel):
             ),
         ]
     )
+    version = models.PositiveIntegerField('Версия', default=0)
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta(CommentReviewModel.Meta):
         constraints = [
             models.UniqueConstraint(fields=['title', 'author'],
                                     name='title_author_uniqueness'),
         ]
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date'),
+                name='review_title_pub_date_idx'
+            ),
+        )
         default_related_name = 'reviews'
         verbose_name = 'обзор'
         verbose_name_plural = 'Обзоры'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_score = instance.__dict__.get('score')
+        instance.loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
 
 class Comment(CommentReviewModel):
     review = models.ForeignKey(
@@ -111,7 +432,15 @@ class Comment(CommentReviewModel):
         verbose_name='Обзор'
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta(CommentReviewModel.Meta):
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
         default_related_name = 'comments'
         verbose_name = 'комментарий',
         verbose_name_plural = 'Комментарии'
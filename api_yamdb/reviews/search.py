@@ -0,0 +1,84 @@
+import re
+
+from django.db import connections
+from django.db.models import F, IntegerField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TERM = re.compile(r'\w+')
+
+
+def match_expression(text):
+    return ' '.join(f'"{term}"*' for term in SEARCH_TERM.findall(text))
+
+
+def text_condition(text, fields):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': text})
+    return condition
+
+
+def full_text_search(queryset, table, text, weights, fields):
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if connections[queryset.db].vendor != 'sqlite':
+        return queryset.filter(
+            text_condition(text, fields)
+        ).annotate(search_rowid=F('pk'))
+    rank = ', '.join([table, *map(str, weights)])
+    return queryset.annotate(
+        search_rowid=RawSQL(f'{table}.rowid', (), IntegerField())
+    ).extra(
+        select={'search_rank': f'bm25({rank})'},
+        tables=[table],
+        where=[
+            f'{table} MATCH %s',
+            f'{table}.rowid = {queryset.model._meta.db_table}.id',
+        ],
+        params=[expression],
+    ).order_by('search_rank', 'pk')
+
+
+def full_text_match(queryset, table, text, fields):
+    expression = match_expression(text)
+    if not expression:
+        return Q(pk__in=())
+    if connections[queryset.db].vendor != 'sqlite':
+        return text_condition(text, fields)
+    return Q(pk__in=RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (expression,)
+    ))
+
+
+def create_fts_sql(table, content_table, fields):
+    columns = ', '.join(fields)
+    new_values = ', '.join(f'new.{field}' for field in fields)
+    old_values = ', '.join(f'old.{field}' for field in fields)
+    delete = (
+        f"INSERT INTO {table}({table}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert = (
+        f"INSERT INTO {table}(rowid, {columns}) "
+        f"VALUES (new.id, {new_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, "
+        f"content='{content_table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3');",
+        f"CREATE TRIGGER {table}_insert AFTER INSERT ON {content_table} "
+        f"BEGIN {insert} END;",
+        f"CREATE TRIGGER {table}_delete AFTER DELETE ON {content_table} "
+        f"BEGIN {delete} END;",
+        f"CREATE TRIGGER {table}_update AFTER UPDATE OF {columns} "
+        f"ON {content_table} BEGIN {delete} {insert} END;",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild');",
+    ]
+
+
+def drop_fts_sql(table):
+    return [
+        f'DROP TRIGGER IF EXISTS {table}_{action};'
+        for action in ('insert', 'delete', 'update')
+    ] + [f'DROP TABLE IF EXISTS {table};']
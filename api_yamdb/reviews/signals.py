@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import Signal, receiver
+
+from reviews.models import (CatalogVersion, Category, Comment, Genre, Review,
+                            Title, TitleGenre, TitleScores, counter_change)
+
+User = get_user_model()
+
+# Массовые изменения в обход сигналов моделей: импорт, генерация данных и
+# пересчёт рейтингов командами.
+catalog_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    titles = Title.objects.filter(pk=instance.title_id)
+    if created:
+        titles.touch(
+            score_sum=counter_change('score_sum', instance.score),
+            reviews_count=counter_change('reviews_count', 1),
+        )
+        TitleScores.objects.change(instance.title_id, added=instance.score)
+    else:
+        previous_score = getattr(instance, 'loaded_score', None)
+        previous_title_id = getattr(instance, 'loaded_title_id', None)
+        if previous_score is None or previous_title_id is None:
+            titles.update_ratings()
+            titles.touch()
+        elif previous_title_id != instance.title_id:
+            Title.objects.filter(pk=previous_title_id).touch(
+                score_sum=counter_change('score_sum', -previous_score),
+                reviews_count=counter_change('reviews_count', -1),
+            )
+            TitleScores.objects.change(
+                previous_title_id, removed=previous_score
+            )
+            titles.touch(
+                score_sum=counter_change('score_sum', instance.score),
+                reviews_count=counter_change('reviews_count', 1),
+            )
+            TitleScores.objects.change(
+                instance.title_id, added=instance.score
+            )
+        else:
+            titles.touch(score_sum=counter_change(
+                'score_sum', instance.score - previous_score
+            ))
+            TitleScores.objects.change(
+                instance.title_id,
+                added=instance.score,
+                removed=previous_score,
+            )
+    instance.loaded_score = instance.score
+    instance.loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).touch(
+        score_sum=counter_change('score_sum', -instance.score),
+        reviews_count=counter_change('reviews_count', -1),
+    )
+    TitleScores.objects.change(instance.title_id, removed=instance.score)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def touch_review(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    Review.objects.filter(pk=instance.review_id).touch()
+
+
+@receiver(pre_save, sender=Title)
+def set_initial_weighted_rating(sender, instance, raw, **kwargs):
+    if not raw and instance._state.adding and not instance.reviews_count:
+        instance.weighted_rating = CatalogVersion.objects.rating_mean()
+
+
+@receiver(pre_save, sender=TitleGenre)
+def copy_weighted_rating(sender, instance, raw, **kwargs):
+    if not raw and instance._state.adding:
+        instance.weighted_rating = Title.objects.filter(
+            pk=instance.title_id
+        ).values_list('weighted_rating', flat=True).first() or 0
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def copy_weighted_ratings(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        links = TitleGenre.objects.filter(genre=instance, title__in=pk_set)
+    else:
+        links = TitleGenre.objects.filter(title=instance, genre__in=pk_set)
+    links.copy_weighted_ratings()
+
+
+@receiver((post_save, post_delete), sender=TitleGenre)
+def touch_title(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    Title.objects.filter(pk=instance.title_id).touch()
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def touch_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            Title.objects.filter(pk=instance.pk).touch()
+    elif action == 'pre_clear':
+        Title.objects.filter(genre=instance).touch()
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+
+
+@receiver(post_save, sender=Genre)
+def touch_genre_titles(sender, instance, created, **kwargs):
+    if not created:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, created=False, **kwargs):
+    if not created:
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(pre_save, sender=User)
+def touch_author_content(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        return
+    if User.objects.filter(pk=instance.pk).exclude(
+            username=instance.username).exists():
+        Title.objects.filter(reviews__author=instance).touch()
+        Review.objects.filter(
+            Q(author=instance) | Q(comments__author=instance)
+        ).touch()
+
+
+@receiver((post_save, post_delete), sender=Title)
+@receiver(catalog_changed)
+def bump_catalog_version(sender, **kwargs):
+    CatalogVersion.objects.bump()
@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from .constants import ADMIN, MODERATOR, ROLE_CLAIMS
+
+User = get_user_model()
+
+
+def user_state_key(user_id):
+    return f'jwt-user-state:{user_id}'
+
+
+def get_user_state(user_id):
+    key = user_state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id, is_active=True).values_list(
+            *ROLE_CLAIMS
+        ).first() or ()
+        cache.set(key, state, settings.JWT_USER_STATE_TIMEOUT)
+    return tuple(state)
+
+
+def forget_user_state(user_id):
+    cache.delete(user_state_key(user_id))
+
+
+class VerifiedTokenCache:
+    def __init__(self):
+        self.lock = Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.tokens = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.key(raw_token)
+        with self.lock:
+            entry = self.tokens.get(key)
+            if entry is not None:
+                token, expires = entry
+                if expires > time.time():
+                    self.tokens.move_to_end(key)
+                    self.hits += 1
+                    return token
+                del self.tokens[key]
+            self.misses += 1
+        return None
+
+    def set(self, raw_token, token):
+        max_size = settings.JWT_VERIFIED_TOKEN_CACHE_SIZE
+        if max_size < 1 or 'exp' not in token:
+            return
+        key = self.key(raw_token)
+        with self.lock:
+            self.tokens[key] = (token, token['exp'])
+            self.tokens.move_to_end(key)
+            while len(self.tokens) > max_size:
+                self.tokens.popitem(last=False)
+
+    def info(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.tokens),
+            }
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+class ClaimsUser(TokenUser):
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        if settings.JWT_VERIFIED_TOKEN_CACHE_SIZE < 1:
+            return super().get_validated_token(raw_token)
+        validated_token = verified_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS_AUTH or any(
+                claim not in validated_token for claim in ROLE_CLAIMS):
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        state = get_user_state(user.id)
+        if not state:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен.',
+                code='user_inactive'
+            )
+        if state != tuple(validated_token[claim] for claim in ROLE_CLAIMS):
+            raise AuthenticationFailed(
+                'Роль пользователя изменилась, получите новый токен.',
+                code='role_changed'
+            )
+        return user
@@ -5,3 +5,4 @@ ADMIN = 'admin'
 MAX_LENGTH_USERNAME = 150
 MAX_LENGTH_EMAIL = 254
 USERNAME_PATTERN = r"^[\w.@+-]+\Z"
+ROLE_CLAIMS = ('role', 'is_staff')
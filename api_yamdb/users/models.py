@@ -7,7 +7,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .constants import (ADMIN, MAX_LENGTH_EMAIL, MAX_LENGTH_USERNAME,
-                        MODERATOR, PROFILE_ENDPOINT_NAME, USER)
+                        MODERATOR, PROFILE_ENDPOINT_NAME, ROLE_CLAIMS, USER)
 
 
 def validate_profile_endpoint_name(value):
@@ -80,5 +80,8 @@ class User(AbstractUser):
         return default_token_generator.make_token(self)
 
     def get_tokens_for_user(self):
-        refresh = RefreshToken.for_user(self)
-        return str(refresh.access_token)
+        access_token = RefreshToken.for_user(self).access_token
+        access_token['username'] = self.username
+        for claim in ROLE_CLAIMS:
+            access_token[claim] = getattr(self, claim)
+        return str(access_token)
@@ -17,7 +17,7 @@ class AdminOrReadOnly(permissions.BasePermission):
 class AuthorOrStaff(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.pk
                 or request.user.is_admin
                 or request.user.is_moderator
                 )
@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import forget_user_state
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=User)
+def reset_user_state(sender, instance, **kwargs):
+    forget_user_state(instance.pk)
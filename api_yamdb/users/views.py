@@ -1,4 +1,5 @@
 from django.core.mail import send_mail
+from django.shortcuts import get_object_or_404
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -65,6 +66,8 @@ class UserViewSet(NoPutModelViewSet):
             url_path=PROFILE_ENDPOINT_NAME)
     def profile_name(self, request):
         user = request.user
+        if not isinstance(user, User):
+            user = get_object_or_404(User, pk=user.pk)
         serializer_class = self.get_serializer_class()
         if request.method == 'PATCH':
             serializer = serializer_class(user,
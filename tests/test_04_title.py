@@ -1,8 +1,18 @@
+import re
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
-from tests.utils import (check_pagination, check_permissions,
-                         create_categories, create_genre, create_titles)
+from api.checks import check_response_cache
+from api.pagination import TopTitlesPagination
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Genre, Review, TitleGenre
+from tests.utils import (check_modified, check_not_modified,
+                         check_pagination, check_permissions, count_queries,
+                         create_categories, create_genre,
+                         create_single_review, create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -350,3 +360,640 @@ class Test04TitleAPI:
             f'Проверьте, что PUT-запрос к `{self.TITLES_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_titles_cursor_pagination(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        expected = []
+        for idx, year in enumerate((1990, 2001, 1990, 1975, 2001, 1990, 1960)):
+            category = categories[idx % 2]['slug']
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': year,
+                'genre': [genres[0]['slug']],
+                'category': category,
+            })
+            expected.append((-year, response.json()['id'], category))
+        expected.sort()
+
+        for query, titles in (
+            ('', expected),
+            (f'&category={categories[0]["slug"]}',
+             [title for title in expected
+              if title[2] == categories[0]['slug']]),
+        ):
+            url = f'{self.TITLES_URL}?pagination=cursor{query}'
+            received = []
+            while url:
+                response = client.get(url)
+                assert response.status_code == HTTPStatus.OK, (
+                    'Проверьте, что GET-запрос к '
+                    f'`{self.TITLES_URL}?pagination=cursor` возвращает ответ '
+                    'со статусом 200.'
+                )
+                data = response.json()
+                assert 'count' not in data, (
+                    'Курсорная пагинация не должна считать общее количество '
+                    'объектов.'
+                )
+                received.extend(title['id'] for title in data['results'])
+                last_page, url = data, data['next']
+            assert received == [title[1] for title in titles], (
+                'Проверьте, что курсорная пагинация '
+                f'`{self.TITLES_URL}?pagination=cursor` возвращает все '
+                'произведения по одному разу в порядке убывания года.'
+            )
+            if len(titles) > 5:
+                previous = client.get(last_page['previous']).json()
+                assert [title['id'] for title in previous['results']] == (
+                    received[:5]
+                ), (
+                    'Проверьте, что ссылка `previous` курсорной пагинации '
+                    'возвращает предыдущую страницу.'
+                )
+
+        response = client.get(f'{self.TITLES_URL}?pagination=cursor&cursor=x')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_08_titles_constant_query_count(self, client, admin_client,
+                                            django_assert_num_queries,
+                                            settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        titles, categories, genres = create_titles(admin_client)
+        urls = (
+            (self.TITLES_URL, 4),
+            (f'{self.TITLES_URL}?pagination=cursor', 3),
+            (self.TITLES_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[0]['id']), 3),
+        )
+        for url, expected_queries in urls:
+            with django_assert_num_queries(expected_queries):
+                client.get(url)
+
+        for idx in range(5):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % 2]['slug'],
+            })
+        for url, expected_queries in urls:
+            with django_assert_num_queries(expected_queries):
+                client.get(url)
+
+    def test_09_titles_response_cache(self, client, admin_client, user_client,
+                                      django_assert_num_queries, settings,
+                                      tmp_path):
+        settings.RESPONSE_CACHE_TIMEOUT = 60
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        for url, expected_queries in ((self.TITLES_URL, 1), (detail_url, 1),
+                                      ('/api/v1/genres/', 0),
+                                      ('/api/v1/categories/', 0)):
+            expected = client.get(url).json()
+            with django_assert_num_queries(expected_queries):
+                response = client.get(url)
+            assert response.json() == expected, (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из '
+                'кеша без изменений.'
+            )
+
+        user_client.post(
+            f'{detail_url}reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        admin_client.patch(
+            f'/api/v1/genres/{genres[0]["slug"]}/', data={'name': 'Триллер'}
+        )
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        title = client.get(detail_url).json()
+        assert title['rating'] == 7, (
+            f'Проверьте, что кеш `{self.TITLES_DETAIL_URL_TEMPLATE}` '
+            'сбрасывается после добавления отзыва.'
+        )
+        assert genres[0] not in title['genre'], (
+            f'Проверьте, что кеш `{self.TITLES_DETAIL_URL_TEMPLATE}` '
+            'сбрасывается после удаления жанра.'
+        )
+        listed = client.get(self.TITLES_URL).json()['results']
+        assert [item['rating'] for item in listed
+                if item['id'] == titles[0]['id']] == [7], (
+            f'Проверьте, что кеш `{self.TITLES_URL}` сбрасывается после '
+            'добавления отзыва.'
+        )
+        genre_slugs = [
+            genre['slug'] for genre in client.get('/api/v1/genres/').json()[
+                'results'
+            ]
+        ]
+        assert genres[0]['slug'] not in genre_slugs, (
+            'Проверьте, что кеш `/api/v1/genres/` сбрасывается после удаления '
+            'жанра.'
+        )
+
+        admin_client.patch(detail_url, data={'name': 'Новое название'})
+        assert client.get(detail_url).json()['name'] == 'Новое название', (
+            f'Проверьте, что кеш `{self.TITLES_DETAIL_URL_TEMPLATE}` '
+            'сбрасывается после изменения произведения.'
+        )
+
+        assert [error.id for error in check_response_cache(None)] == [
+            'api.E001'
+        ], (
+            'Проверьте, что включённый кеш ответов с `LocMemCache` '
+            'отклоняется проверкой `api.E001`: у каждого воркера он свой.'
+        )
+        settings.CACHES = {**settings.CACHES, 'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        settings.RESPONSE_CACHE_ALIAS = 'shared'
+        assert check_response_cache(None) == [], (
+            'Проверьте, что кеш ответов с общим бэкендом проходит проверку.'
+        )
+
+    def test_10_titles_conditional_get(self, client, admin_client,
+                                       user_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        list_url = f'{self.TITLES_URL}?page=1'
+        list_etag = check_not_modified(client, list_url)
+        detail_etag = check_not_modified(client, detail_url)
+        response = client.get(
+            f'{self.TITLES_URL}?year={titles[0]["year"]}',
+            HTTP_IF_NONE_MATCH=list_etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `ETag` ответа на GET-запрос к `{self.TITLES_URL}` '
+            'зависит от параметров запроса.'
+        )
+
+        user_client.post(
+            f'{detail_url}reviews/', data={'text': 'Отзыв', 'score': 7}
+        )
+        check_modified(client, list_url, list_etag, 'добавления отзыва')
+        check_modified(client, detail_url, detail_etag, 'добавления отзыва')
+
+        detail_etag = check_not_modified(client, detail_url)
+        admin_client.patch(
+            f'/api/v1/genres/{genres[0]["slug"]}/', data={'name': 'Триллер'}
+        )
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        check_modified(client, detail_url, detail_etag, 'удаления жанра')
+
+        for action, change in (
+            ('удаления произведения', lambda: admin_client.delete(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=titles[1]['id']
+                )
+            )),
+            ('генерации данных', lambda: call_command(
+                'generate_data', '--reviews', '10', '--titles', '2',
+                '--users', '10', '--seed', '3', stdout=StringIO()
+            )),
+        ):
+            list_etag = check_not_modified(client, list_url)
+            with CaptureQueriesContext(connection) as context:
+                client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+            assert 'reviews_title' not in context.captured_queries[0]['sql'], (
+                f'Проверьте, что `ETag` ответа на GET-запрос к `{list_url}` '
+                'строится по счётчику изменений каталога, а не по таблице '
+                'произведений.'
+            )
+            change()
+            check_modified(client, list_url, list_etag, action)
+
+    def test_11_titles_slug_lookup(self, admin_client, settings):
+        titles, categories, genres = create_titles(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        }
+        one_genre = count_queries(
+            admin_client, self.TITLES_URL, method='post', data=data
+        )
+        data['genre'] = [genre['slug'] for genre in genres]
+        all_genres = count_queries(
+            admin_client, self.TITLES_URL, method='post', data=data
+        )
+        assert one_genre == all_genres, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` проверяет '
+            'жанры без отдельного SQL-запроса на каждый слаг.'
+        )
+
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        data['genre'] = ['western']
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` принимает '
+            'только что созданный жанр.'
+        )
+        admin_client.delete('/api/v1/genres/western/')
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` с удалённым '
+            'жанром возвращает ответ со статусом 400.'
+        )
+
+        response = admin_client.get(
+            f'{self.TITLES_URL}?genre={genres[2]["slug"].upper()}'
+            f'&category={categories[1]["slug"].upper()}'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], (
+            f'Проверьте, что фильтрация `{self.TITLES_URL}` по слагам жанра и '
+            'категории не зависит от регистра.'
+        )
+
+        Genre.objects.bulk_create([Genre(name='Нуар', slug='noir')])
+        TitleGenre.objects.bulk_create([TitleGenre(
+            title_id=titles[0]['id'], genre=Genre.objects.get(slug='noir')
+        )])
+        response = admin_client.get(
+            self.TITLES_URL, data={'genre': 'noir', 'facets': 'genre'}
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ] and 'noir' in response.json()['facets']['genre'], (
+            f'Проверьте, что фильтр и фасеты `{self.TITLES_URL}` находят '
+            'жанр, добавленный другим процессом, которого ещё нет в памяти.'
+        )
+        Genre.objects.filter(slug='noir').update(slug='neo-noir')
+        settings.SLUG_MAP_TIMEOUT = 0
+        for slug, expected in (('noir', []), ('neo-noir', [titles[0]['id']])):
+            response = admin_client.get(self.TITLES_URL, data={'genre': slug})
+            assert [
+                title['id'] for title in response.json()['results']
+            ] == expected, (
+                f'Проверьте, что слаги жанров в памяти процесса устаревают '
+                'через `SLUG_MAP_TIMEOUT` секунд.'
+            )
+
+        settings.SLUG_MAP_TIMEOUT = 60
+        Genre.objects.bulk_create([Genre(name='Мистика', slug='mystery')])
+        admin_client.get(self.TITLES_URL, data={'genre': 'mystery'})
+        genres = Genre.objects.filter(slug='mystery')
+        genres._raw_delete(genres.db)
+        data['genre'] = ['mystery']
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{self.TITLES_URL}` сверяет жанры с '
+            'БД и возвращает 400 для жанра, удалённого другим процессом.'
+        )
+
+    def test_12_titles_search(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Орешки и белки',
+            'year': 2001,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Терминатор тут не появляется',
+        })
+
+        def search(text):
+            response = client.get(self.TITLES_URL, data={'search': text})
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с '
+                f'параметром `search={text}` возвращает ответ со статусом 200.'
+            )
+            return [title['name'] for title in response.json()['results']]
+
+        assert search('термин') == ['Терминатор', 'Орешки и белки'], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` находит '
+            'произведения по началу слова в названии и описании, а совпадения '
+            'в названии идут первыми.'
+        )
+        assert search('yippie') == ['Крепкий орешек'], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` учитывает '
+            'описание произведения.'
+        )
+        assert search('"(') == [], (
+            f'Проверьте, что `{self.TITLES_URL}?search=` без слов возвращает '
+            'пустой список.'
+        )
+
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        admin_client.patch(detail_url, data={'name': 'Чужие'})
+        assert search('чужие') == ['Чужие'] and 'Терминатор' not in search(
+            'терминатор'
+        ), (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` учитывает '
+            'изменение названия произведения.'
+        )
+        admin_client.delete(detail_url)
+        assert search('чужие') == [], (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` не находит '
+            'удалённые произведения.'
+        )
+
+        from reviews.models import Title
+
+        plan = Title.objects.search('орешек').explain()
+        assert 'VIRTUAL TABLE' in plan and not re.search(
+            r'SCAN (TABLE )?reviews_title\b(?!_fts)', plan
+        ), (
+            f'Проверьте, что поиск `{self.TITLES_URL}?search=` использует '
+            'полнотекстовый индекс, а не просматривает всю таблицу '
+            'произведений.'
+        )
+
+    def test_13_titles_autocomplete(self, client, admin_client, user_client,
+                                    django_assert_num_queries):
+        url = f'{self.TITLES_URL}autocomplete/'
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Терминатор 2: Судный день',
+            'year': 1991,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        sequel_id = response.json()['id']
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 6)
+
+        def autocomplete(text):
+            response = client.get(url, data={'q': text})
+            assert response.status_code == HTTPStatus.OK, (
+                f'Эндпоинт `{url}` не найден или возвращает ошибку.'
+            )
+            return [title['id'] for title in response.json()]
+
+        assert autocomplete('тер') == [titles[0]['id'], sequel_id], (
+            f'Проверьте, что `{url}?q=` возвращает произведения, название '
+            'которых начинается с запроса, в порядке убывания рейтинга.'
+        )
+        with django_assert_num_queries(0):
+            assert autocomplete('судн') == [sequel_id], (
+                f'Проверьте, что `{url}?q=` ищет по началу любого слова '
+                'названия без запросов к БД.'
+            )
+        assert autocomplete('терминатор 2 судный д') == [sequel_id], (
+            f'Проверьте, что `{url}?q=` работает для длинных запросов.'
+        )
+        assert autocomplete('') == [] and autocomplete('ъъъ') == [], (
+            f'Проверьте, что `{url}?q=` без совпадений возвращает пустой '
+            'список.'
+        )
+
+        create_single_review(user_client, sequel_id, 'Отзыв', 9)
+        assert autocomplete('терминатор') == [sequel_id, titles[0]['id']], (
+            f'Проверьте, что порядок в `{url}` обновляется после добавления '
+            'отзыва.'
+        )
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        admin_client.patch(detail_url, data={'name': 'Чужие'})
+        assert autocomplete('ЧУЖ') == [titles[0]['id']], (
+            f'Проверьте, что `{url}` учитывает изменение названия.'
+        )
+        admin_client.delete(detail_url)
+        assert autocomplete('чуж') == [], (
+            f'Проверьте, что `{url}` не возвращает удалённые произведения.'
+        )
+
+    def test_14_titles_multi_genre_filter(self, client, admin_client,
+                                          settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        })
+
+        def found(query):
+            response = client.get(f'{self.TITLES_URL}?{query}')
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{self.TITLES_URL}?{query}` '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert data['count'] == len(data['results']), (
+                f'Проверьте, что `count` в ответе на `{self.TITLES_URL}` '
+                'совпадает с числом найденных произведений.'
+            )
+            return sorted(title['name'] for title in data['results'])
+
+        assert found('genre=horror,drama') == [
+            'Крепкий орешек', 'Терминатор', 'Чужой'
+        ], (
+            f'Проверьте, что `{self.TITLES_URL}?genre=a,b` возвращает '
+            'произведения хотя бы с одним из жанров без повторов.'
+        )
+        assert found('genre=HORROR,comedy&genre_mode=all') == [
+            'Терминатор', 'Чужой'
+        ], (
+            f'Проверьте, что `{self.TITLES_URL}?genre=a,b&genre_mode=all` '
+            'возвращает произведения со всеми указанными жанрами.'
+        )
+        assert found('genre=horror,comedy,drama&genre_mode=all') == [
+            'Чужой'
+        ]
+        assert found('genre=horror,unknown&genre_mode=all') == []
+        assert found('genre=horror,unknown&genre_mode=any') == [
+            'Терминатор', 'Чужой'
+        ]
+        response = client.get(f'{self.TITLES_URL}?genre_mode=some')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.TITLES_URL}` с некорректным '
+            '`genre_mode` возвращает ответ со статусом 400.'
+        )
+
+        one_genre = count_queries(
+            client, f'{self.TITLES_URL}?genre=horror&genre_mode=all'
+        )
+        all_genres = count_queries(
+            client, f'{self.TITLES_URL}?genre=horror,comedy,drama'
+            '&genre_mode=all'
+        )
+        assert one_genre == all_genres, (
+            f'Проверьте, что фильтрация `{self.TITLES_URL}` по нескольким '
+            'жанрам не добавляет SQL-запросов.'
+        )
+
+    def test_15_titles_top(self, client, admin_client, django_user_model,
+                           settings, monkeypatch):
+        settings.TOP_TITLES_MIN_REVIEWS = 2
+        titles, categories, genres = create_titles(admin_client)
+        titles.append(admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        }).json())
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'critic{index}', email=f'critic{index}@yamdb.fake'
+            )
+            for index in range(4)
+        ]
+        scores = {titles[0]['id']: [10], titles[1]['id']: [9] * 4,
+                  titles[2]['id']: [2] * 3}
+        for title_id, title_scores in scores.items():
+            for author, score in zip(authors, title_scores):
+                Review.objects.create(
+                    title_id=title_id, author=author, score=score, text='Отзыв'
+                )
+        call_command('update_weighted_ratings', stdout=StringIO())
+        url = f'{self.TITLES_URL}top/'
+
+        def top(query=''):
+            response = client.get(f'{url}{query}')
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}{query}` возвращает ответ '
+                'со статусом 200.'
+            )
+            return [title['id'] for title in response.json()['results']]
+
+        ids = [title['id'] for title in titles]
+        assert top() == [ids[1], ids[0], ids[2]], (
+            f'Проверьте, что `{url}` сортирует произведения по взвешенному '
+            'рейтингу: одна оценка 10 не выше множества оценок 9.'
+        )
+        response = client.get(url)
+        assert response.json()['results'][0]['weighted_rating'] == (
+            pytest.approx(49 / 6)
+        ), (
+            f'Проверьте, что `{url}` возвращает взвешенный рейтинг '
+            'произведения.'
+        )
+        assert top('?category=films') == [ids[0], ids[2]], (
+            f'Проверьте, что `{url}` фильтрует по категории.'
+        )
+        assert top('?genre=horror') == [ids[0], ids[2]], (
+            f'Проверьте, что `{url}` фильтрует по жанру.'
+        )
+        assert top('?genre=horror,drama') == [ids[1], ids[0], ids[2]], (
+            f'Проверьте, что `{url}` фильтрует по нескольким жанрам.'
+        )
+        assert top('?genre=horror&category=books') == []
+
+        monkeypatch.setattr(TopTitlesPagination, 'page_size', 1)
+        for query, expected in (('', ids[1:2] + ids[0:1] + ids[2:]),
+                                ('?genre=horror', [ids[0], ids[2]])):
+            response = client.get(f'{url}{query}')
+            found = []
+            while True:
+                data = response.json()
+                found += [title['id'] for title in data['results']]
+                if not data['next']:
+                    break
+                response = client.get(data['next'])
+            assert found == expected, (
+                f'Проверьте, что курсорная пагинация `{url}{query}` '
+                'возвращает все произведения по порядку.'
+            )
+
+        monkeypatch.undo()
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=ids[1])
+        admin_client.patch(detail_url, data={'genre': [
+            genre['slug'] for genre in client.get(detail_url).json()['genre']
+        ] + ['horror']}, format='json')
+        assert top('?genre=horror') == [ids[1], ids[0], ids[2]], (
+            f'Проверьте, что новая связь произведения с жанром получает '
+            f'взвешенный рейтинг произведения в `{url}?genre=horror`.'
+        )
+        new_id = admin_client.post(self.TITLES_URL, data={
+            'name': 'Новинка',
+            'year': 2000,
+            'genre': ['horror'],
+            'category': categories[0]['slug'],
+        }).json()['id']
+        Review.objects.create(
+            title_id=new_id, author=authors[0], score=10, text='Отзыв'
+        )
+        for query in ('', '?genre=horror'):
+            ratings = {
+                title['id']: title['weighted_rating']
+                for title in client.get(f'{url}{query}').json()['results']
+            }
+            assert ratings[new_id] == pytest.approx(52 / 8), (
+                f'Проверьте, что новое произведение до пересчёта получает в '
+                f'`{url}{query}` взвешенный рейтинг, равный средней оценке '
+                'каталога.'
+            )
+
+    def test_16_titles_facets(self, client, admin_client, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 60
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post(self.TITLES_URL, data={
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+        })
+
+        def facets(query):
+            url = f'{self.TITLES_URL}?{query}'
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            queries = [query['sql'] for query in context.captured_queries]
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 200.'
+            )
+            return response.json().get('facets'), [
+                sql for sql in queries if 'UNION ALL' in sql
+            ]
+
+        result, queries = facets('facets=category,genre,year')
+        assert result == {
+            'category': {'films': 2, 'books': 1},
+            'genre': {'horror': 2, 'comedy': 2, 'drama': 2},
+            'year': {'1979': 1, '1984': 1, '1988': 1},
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}?facets=` возвращает число '
+            'произведений для каждой категории, жанра и года.'
+        )
+        assert len(queries) == 1, (
+            'Проверьте, что все фасеты считаются одним SQL-запросом.'
+        )
+        result, _ = facets('facets=genre,year&category=films')
+        assert result == {
+            'genre': {'horror': 2, 'comedy': 2, 'drama': 1},
+            'year': {'1979': 1, '1984': 1},
+        }, (
+            f'Проверьте, что `{self.TITLES_URL}?facets=` учитывает фильтры '
+            'списка произведений.'
+        )
+        assert list(result['genre']) == ['horror', 'comedy', 'drama'], (
+            'Проверьте, что значения фасетов отсортированы по убыванию '
+            'числа произведений.'
+        )
+        result, queries = facets(
+            'facets=genre,year&category=films&pagination=cursor'
+        )
+        assert result['genre'] == {'horror': 2, 'comedy': 2, 'drama': 1} and (
+            not queries
+        ), (
+            'Проверьте, что фасеты для того же фильтра берутся из кеша на '
+            'других страницах.'
+        )
+
+        admin_client.delete(f'{self.TITLES_URL}{titles[0]["id"]}/')
+        result, _ = facets('facets=genre&category=films&pagination=cursor')
+        assert result == {'genre': {'comedy': 1, 'drama': 1, 'horror': 1}}, (
+            'Проверьте, что фасеты пересчитываются после изменения '
+            'произведений.'
+        )
+        assert facets('category=films')[0] is None, (
+            f'Проверьте, что без параметра `facets` ответ `{self.TITLES_URL}` '
+            'не содержит фасетов.'
+        )
+        response = client.get(self.TITLES_URL, {'facets': 'rating'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что `{self.TITLES_URL}` с неизвестным фасетом '
+            'возвращает ответ со статусом 400.'
+        )
@@ -1,8 +1,17 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
 from django.db.utils import IntegrityError
-from tests.utils import (check_fields, check_pagination, create_reviews,
+from django.test.utils import CaptureQueriesContext
+from reviews.management.commands.check_ratings import Command as CheckRatings
+from reviews.models import Review, Title, TitleScores
+from tests.utils import (check_fields, check_modified, check_not_modified,
+                         check_pagination, create_reviews,
                          create_single_review, create_titles)
 
 
@@ -10,6 +19,7 @@ from tests.utils import (check_fields, check_pagination, create_reviews,
 class Test05ReviewAPI:
 
     TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    RATING_URL_TEMPLATE = '/api/v1/titles/{title_id}/rating/'
     REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
     REVIEW_DETAIL_URL_TEMPLATE = (
         '/api/v1/titles/{title_id}/reviews/{review_id}/'
@@ -410,3 +420,364 @@ class Test05ReviewAPI:
             f'Проверьте, что PUT-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_07_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        user_review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        assert_msg = (
+            'Проверьте, что рейтинг произведения в ответе на GET-запрос к '
+            f'`{self.TITLE_DETAIL_URL_TEMPLATE}` пересчитывается при '
+            '{action} отзыва.'
+        )
+
+        user_client.patch(user_review_url, data={'score': 8})
+        rating = admin_client.get(title_url).json().get('rating')
+        assert rating == 6, assert_msg.format(action='изменении')
+
+        user_client.delete(user_review_url)
+        rating = admin_client.get(title_url).json().get('rating')
+        assert rating == 5, assert_msg.format(action='удалении')
+
+        moderator.delete()
+        admin.delete()
+        rating = user_client.get(title_url).json().get('rating')
+        assert rating is None, assert_msg.format(
+            action='удалении автора'
+        )
+
+    def test_08_reviews_conditional_get(self, client, admin_client, admin,
+                                        user_client, user, moderator_client,
+                                        moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        list_url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        detail_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        list_etag = check_not_modified(client, list_url)
+        detail_etag = check_not_modified(client, detail_url)
+        last_modified = client.get(list_url)['Last-Modified']
+        response = client.get(list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.REVIEWS_URL_TEMPLATE}` с '
+            'актуальным `If-Modified-Since` возвращает ответ со статусом 304.'
+        )
+
+        user_client.patch(detail_url, data={'text': 'Новый текст'})
+        check_modified(client, list_url, list_etag, 'изменения отзыва')
+        check_modified(client, detail_url, detail_etag, 'изменения отзыва')
+
+        list_etag = check_not_modified(client, list_url)
+        user_client.delete(detail_url)
+        check_modified(client, list_url, list_etag, 'удаления отзыва')
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{self.REVIEW_DETAIL_URL_TEMPLATE}` '
+            'для удалённого отзыва возвращает ответ со статусом 404.'
+        )
+
+    def test_09_title_rating_histogram(self, client, admin_client, admin,
+                                       user_client, user, moderator_client,
+                                       moderator, django_assert_num_queries):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = self.RATING_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        def histogram(**counts):
+            result = {str(score): 0 for score in range(1, 11)}
+            result.update(counts)
+            return result
+
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.RATING_URL_TEMPLATE}` '
+            'возвращает ответ со статусом 200 одним SQL-запросом.'
+        )
+        assert response.json() == {
+            'count': 3, 'mean': 5.0, 'histogram': histogram(**{'5': 3})
+        }, (
+            f'Проверьте, что `{self.RATING_URL_TEMPLATE}` возвращает число '
+            'отзывов, среднюю оценку и количество каждой оценки.'
+        )
+
+        user_review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        user_client.patch(user_review_url, data={'score': 10})
+        assert client.get(url).json() == {
+            'count': 3,
+            'mean': 6.67,
+            'histogram': histogram(**{'5': 2, '10': 1}),
+        }, (
+            f'Проверьте, что `{self.RATING_URL_TEMPLATE}` учитывает '
+            'изменение оценки.'
+        )
+        moderator_client.delete(self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[2]['id']
+        ))
+        expected = {
+            'count': 2,
+            'mean': 7.5,
+            'histogram': histogram(**{'5': 1, '10': 1}),
+        }
+        assert client.get(url).json() == expected, (
+            f'Проверьте, что `{self.RATING_URL_TEMPLATE}` учитывает '
+            'удаление отзыва.'
+        )
+
+        Title.objects.update_ratings()
+        assert client.get(url).json() == expected, (
+            'Проверьте, что пересчёт рейтингов восстанавливает распределение '
+            'оценок.'
+        )
+        assert client.get(self.RATING_URL_TEMPLATE.format(
+            title_id=titles[1]['id']
+        )).json() == {'count': 0, 'mean': None, 'histogram': histogram()}, (
+            f'Проверьте, что `{self.RATING_URL_TEMPLATE}` для произведения '
+            'без отзывов возвращает пустое распределение.'
+        )
+        response = client.get(self.RATING_URL_TEMPLATE.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{self.RATING_URL_TEMPLATE}` для '
+            'несуществующего произведения возвращает ответ со статусом 404.'
+        )
+
+    def test_10_check_ratings(self, client, admin_client, admin, user_client,
+                              user, moderator_client, moderator, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        title_url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        rating_url = self.RATING_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        expected_title = client.get(title_url).json()
+        expected_rating = client.get(rating_url).json()
+        stdout = StringIO()
+        call_command('check_ratings', stdout=stdout)
+        assert 'расхождений: 0' in stdout.getvalue(), (
+            'Проверьте, что команда `check_ratings` не находит расхождений '
+            'в согласованных счётчиках.'
+        )
+
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_sum=F('score_sum') + 7, reviews_count=0
+        )
+        TitleScores.objects.filter(pk=titles[0]['id']).update(score_5=0)
+        stdout = StringIO()
+        with pytest.raises(CommandError):
+            call_command('check_ratings', '--chunk-size', '2', stdout=stdout)
+        assert f'Произведение {titles[0]["id"]}:' in stdout.getvalue(), (
+            'Проверьте, что команда `check_ratings` выводит произведения '
+            'с расхождениями и завершается с ошибкой.'
+        )
+        assert client.get(title_url).json()['rating'] != (
+            expected_title['rating']
+        ), 'Проверьте, что проверка рейтингов без --fix ничего не меняет.'
+
+        stdout = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'check_ratings', '--fix', '--chunk-size', '2',
+                '--batch-size', '1', stdout=stdout
+            )
+        assert not [
+            query['sql'] for query in context.captured_queries
+            if 'reviews_review' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ], (
+            'Проверьте, что команда `check_ratings --fix` записывает '
+            'посчитанные счётчики напрямую, без повторного чтения отзывов '
+            'в подзапросах.'
+        )
+        assert 'исправлено: 1' in stdout.getvalue(), (
+            'Проверьте, что команда `check_ratings --fix` исправляет '
+            'расхождения.'
+        )
+        assert client.get(title_url).json() == expected_title, (
+            'Проверьте, что команда `check_ratings --fix` восстанавливает '
+            'рейтинг произведения.'
+        )
+        assert client.get(rating_url).json() == expected_rating, (
+            'Проверьте, что команда `check_ratings --fix` восстанавливает '
+            'распределение оценок.'
+        )
+        stdout = StringIO()
+        call_command('check_ratings', stdout=stdout)
+        assert 'расхождений: 0' in stdout.getvalue(), (
+            'Проверьте, что после `check_ratings --fix` расхождений не '
+            'остаётся.'
+        )
+
+    def test_11_review_moved_to_another_title(self, client, admin_client,
+                                              admin, user_client, user,
+                                              settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        old_url = self.RATING_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        new_url = self.RATING_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        review = Review.objects.get(pk=reviews[1]['id'])
+        review.title_id = titles[1]['id']
+        review.score = 8
+        review.save()
+
+        assert client.get(old_url).json()['histogram']['5'] == 1 and (
+            client.get(new_url).json()['histogram']['8'] == 1
+        ), (
+            'Проверьте, что при переносе отзыва на другое произведение '
+            'распределения оценок обоих произведений пересчитываются.'
+        )
+        ratings = dict(Title.objects.filter(
+            pk__in=(titles[0]['id'], titles[1]['id'])
+        ).values_list('pk', 'reviews_count'))
+        assert ratings == {titles[0]['id']: 1, titles[1]['id']: 1}, (
+            'Проверьте, что при переносе отзыва число отзывов обоих '
+            'произведений пересчитывается.'
+        )
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        assert response.json()['rating'] == 8, (
+            'Проверьте, что при переносе отзыва рейтинг нового '
+            'произведения пересчитывается.'
+        )
+        response = admin_client.delete(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=titles[1]['id'])
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что произведение с перенесённым отзывом можно '
+            'удалить.'
+        )
+
+    def test_12_title_save_keeps_counters(self, admin_client, admin,
+                                          user_client, user):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        title = Title.objects.get(pk=titles[0]['id'])
+        Review.objects.filter(pk=reviews[0]['id']).delete()
+        title.name = 'Терминатор 2'
+        title.save()
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count) == (5, 1), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'счётчики отзывов устаревшими значениями.'
+        )
+        response = admin_client.patch(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.pk),
+            data={'name': 'Терминатор 3', 'reviews_count': 100},
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что PATCH-запрос администратора к произведению '
+            'возвращает ответ со статусом 200.'
+        )
+        title.refresh_from_db()
+        assert (title.name, title.reviews_count) == ('Терминатор 3', 1), (
+            'Проверьте, что счётчики произведения нельзя изменить через API.'
+        )
+
+    def test_13_loaddata_keeps_counters(self, admin_client, admin,
+                                        user_client, user, tmp_path):
+        create_reviews(admin_client, {admin: admin_client, user: user_client})
+        Review.objects.first().comments.create(author=admin, text='Коммент')
+        counters = list(Title.objects.order_by('pk').values_list(
+            'pk', 'score_sum', 'reviews_count'
+        ))
+        scores = list(TitleScores.objects.order_by('pk').values())
+        fixture = str(tmp_path / 'reviews.json')
+        call_command('dumpdata', 'reviews', output=fixture, stdout=StringIO())
+        Title.objects.all().delete()
+        call_command('loaddata', fixture, stdout=StringIO())
+        assert list(Title.objects.order_by('pk').values_list(
+            'pk', 'score_sum', 'reviews_count'
+        )) == counters, (
+            'Проверьте, что `loaddata` не добавляет оценки загружаемых '
+            'отзывов к счётчикам, которые уже есть в фикстуре.'
+        )
+        assert list(TitleScores.objects.order_by('pk').values()) == scores, (
+            'Проверьте, что `loaddata` не меняет распределение оценок, '
+            'загруженное из фикстуры.'
+        )
+        call_command('check_ratings', stdout=StringIO())
+
+    def test_14_review_changes_with_drifted_counters(self, admin_client,
+                                                     admin, user_client, user):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        review = Review.objects.get(pk=reviews[0]['id'])
+        Title.objects.filter(pk=review.title_id).update(
+            score_sum=0, reviews_count=0
+        )
+        TitleScores.objects.filter(pk=review.title_id).update(
+            **{f'score_{review.score}': 0}
+        )
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.pk
+        )
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что удаление отзыва не падает, если счётчики '
+            'произведения уже занижены расхождением.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert (title.score_sum, title.reviews_count) == (0, 0), (
+            'Проверьте, что счётчики произведения не уходят ниже нуля.'
+        )
+        call_command('check_ratings', '--fix', stdout=StringIO())
+        call_command('check_ratings', stdout=StringIO())
+
+    def test_15_check_ratings_fix_keeps_concurrent_reviews(
+            self, admin_client, admin, user_client, user, moderator_client,
+            monkeypatch):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(reviews_count=0)
+        fix = CheckRatings.fix
+
+        def fix_after_new_review(command, title_ids, chunk_size):
+            create_single_review(moderator_client, title_id, 'Новый', 3)
+            return fix(command, title_ids, chunk_size)
+
+        monkeypatch.setattr(CheckRatings, 'fix', fix_after_new_review)
+        call_command('check_ratings', '--fix', stdout=StringIO())
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.reviews_count) == (13, 3), (
+            'Проверьте, что команда `check_ratings --fix` пересчитывает '
+            'счётчики внутри транзакции и не теряет отзывы, добавленные '
+            'после первой проверки.'
+        )
+        monkeypatch.undo()
+        call_command('check_ratings', stdout=StringIO())
@@ -1,8 +1,9 @@
 from http import HTTPStatus
 
 import pytest
-from tests.utils import (check_fields, check_pagination, create_comments,
-                         create_reviews, create_single_comment)
+from tests.utils import (check_fields, check_modified, check_not_modified,
+                         check_pagination, create_comments, create_reviews,
+                         create_single_comment)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -365,3 +366,66 @@ class Test06CommentAPI:
             f'Проверьте, что PUT-запрос к `{self.COMMENT_DETAIL_URL_TEMPLATE} '
             'не предусмотрен и возвращает статус 405.'
         )
+
+    def test_08_comments_missing_parent(self, client, admin_client, admin,
+                                        user_client, user, moderator_client,
+                                        moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        urls = (
+            '/api/v1/titles/999/reviews/',
+            self.COMMENTS_URL_TEMPLATE.format(title_id='999', review_id='999'),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[1]['id'], review_id=reviews[0]['id']
+            ),
+            self.COMMENT_DETAIL_URL_TEMPLATE.format(
+                title_id=titles[1]['id'],
+                review_id=reviews[0]['id'],
+                comment_id=comments[0]['id']
+            ),
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'произведения или отзыва другого произведения возвращает '
+                'ответ со статусом 404.'
+            )
+
+    def test_09_comments_conditional_get(self, client, admin_client, admin,
+                                         user_client, user, moderator_client,
+                                         moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        list_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        detail_url = self.COMMENT_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'],
+            review_id=reviews[0]['id'],
+            comment_id=comments[1]['id']
+        )
+        list_etag = check_not_modified(client, list_url)
+        detail_etag = check_not_modified(client, detail_url)
+
+        user_client.patch(detail_url, data={'text': 'Новый текст'})
+        check_modified(client, list_url, list_etag, 'изменения комментария')
+        check_modified(
+            client, detail_url, detail_etag, 'изменения комментария'
+        )
+
+        list_etag = check_not_modified(client, list_url)
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        check_modified(
+            client, list_url, list_etag, 'изменения имени автора'
+        )
@@ -0,0 +1,273 @@
+from http import HTTPStatus
+
+import pytest
+from api.slugs import category_slugs, genre_slugs
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import count_queries, create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueryBudget:
+
+    READ_BUDGETS = {
+        'titles': ('/api/v1/titles/', 4),
+        'titles-cursor': ('/api/v1/titles/?pagination=cursor', 3),
+        'titles-filter': ('/api/v1/titles/?genre=horror&category=films', 4),
+        'title-detail': ('/api/v1/titles/{title_id}/', 3),
+        'genres': ('/api/v1/genres/', 2),
+        'categories': ('/api/v1/categories/', 2),
+        'reviews': ('/api/v1/titles/{title_id}/reviews/', 3),
+        'review-detail': (
+            '/api/v1/titles/{title_id}/reviews/{review_id}/', 2
+        ),
+        'comments': (
+            '/api/v1/titles/{title_id}/reviews/{review_id}/comments/', 3
+        ),
+        'comment-detail': (
+            '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            '{comment_id}/', 2
+        ),
+        'users': ('/api/v1/users/', 3),
+        'user-detail': ('/api/v1/users/{username}/', 2),
+        'users-me': ('/api/v1/users/me/', 1),
+        'titles-top': ('/api/v1/titles/top/', 2),
+        'title-rating': ('/api/v1/titles/{title_id}/rating/', 1),
+        'titles-autocomplete': ('/api/v1/titles/autocomplete/?q=ter', 0),
+        'search-reviews': ('/api/v1/search/reviews/?q=review', 1),
+        'search-comments': ('/api/v1/search/comments/?q=comment', 1),
+    }
+    WRITE_BUDGETS = {
+        'title-create': ('admin', 'post', '/api/v1/titles/', {
+            'name': 'Новое {suffix}', 'year': 2000,
+            'genre': ['horror', 'comedy'], 'category': 'films',
+        }, 'new_title_id', 14),
+        'title-update': ('admin', 'patch', '/api/v1/titles/{new_title_id}/', {
+            'name': 'Изменённое {suffix}', 'genre': ['drama'],
+        }, None, 19),
+        'review-create': (
+            'writer', 'post', '/api/v1/titles/{new_title_id}/reviews/',
+            {'text': 'Отзыв {suffix}', 'score': 7}, 'new_review_id', 11
+        ),
+        'review-update': (
+            'writer', 'patch',
+            '/api/v1/titles/{new_title_id}/reviews/{new_review_id}/',
+            {'text': 'Изменённый отзыв', 'score': 3}, None, 6
+        ),
+        'comment-create': (
+            'writer', 'post',
+            '/api/v1/titles/{new_title_id}/reviews/{new_review_id}/'
+            'comments/',
+            {'text': 'Комментарий {suffix}'}, 'new_comment_id', 5
+        ),
+        'comment-update': (
+            'writer', 'patch',
+            '/api/v1/titles/{new_title_id}/reviews/{new_review_id}/'
+            'comments/{new_comment_id}/',
+            {'text': 'Изменённый комментарий'}, None, 4
+        ),
+        'comment-delete': (
+            'moderator', 'delete',
+            '/api/v1/titles/{new_title_id}/reviews/{new_review_id}/'
+            'comments/{new_comment_id}/', None, None, 5
+        ),
+        'review-delete': (
+            'moderator', 'delete',
+            '/api/v1/titles/{new_title_id}/reviews/{new_review_id}/',
+            None, None, 8
+        ),
+        'title-delete': (
+            'admin', 'delete', '/api/v1/titles/{new_title_id}/', None, None,
+            11
+        ),
+        'genre-create': ('admin', 'post', '/api/v1/genres/', {
+            'name': 'Жанр {suffix}', 'slug': 'new-genre-{suffix}',
+        }, None, 3),
+        'genre-delete': (
+            'admin', 'delete', '/api/v1/genres/new-genre-{suffix}/', None,
+            None, 5
+        ),
+        'category-create': ('admin', 'post', '/api/v1/categories/', {
+            'name': 'Категория {suffix}', 'slug': 'new-category-{suffix}',
+        }, None, 3),
+        'category-delete': (
+            'admin', 'delete', '/api/v1/categories/new-category-{suffix}/',
+            None, None, 6
+        ),
+        'user-create': ('admin', 'post', '/api/v1/users/', {
+            'username': 'new-user-{suffix}',
+            'email': 'new-user-{suffix}@yamdb.fake',
+        }, None, 4),
+        'user-update': (
+            'admin', 'patch', '/api/v1/users/new-user-{suffix}/',
+            {'role': 'moderator'}, None, 6
+        ),
+        'user-delete': (
+            'admin', 'delete', '/api/v1/users/new-user-{suffix}/', None,
+            None, 9
+        ),
+        'users-me-update': (
+            'writer', 'patch', '/api/v1/users/me/', {'bio': 'О себе'}, None,
+            5
+        ),
+    }
+    SIGNUP_BUDGET = 5
+    TOKEN_BUDGET = 3
+
+    def measure_reads(self, client, admin_client, ids):
+        measured = {}
+        for name, (url, _) in self.READ_BUDGETS.items():
+            api_client = admin_client if name.startswith('user') else client
+            api_client.get(url.format(**ids))
+            measured[name] = count_queries(api_client, url.format(**ids))
+        return measured
+
+    def measure_writes(self, clients, suffix):
+        ids = {'suffix': suffix}
+        measured = {}
+        genre_slugs.load()
+        category_slugs.load()
+        for name, (client_name, method, url, data, id_key, _) in (
+                self.WRITE_BUDGETS.items()):
+            url = url.format(**ids)
+            if data is not None:
+                data = {
+                    key: value.format(**ids) if isinstance(value, str)
+                    else value
+                    for key, value in data.items()
+                }
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(clients[client_name], method)(
+                    url, data=data, format='json'
+                )
+            assert response.status_code < HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что {method.upper()}-запрос к `{url}` '
+                'выполняется успешно. Сейчас возвращается статус '
+                f'{response.status_code}.'
+            )
+            if id_key:
+                ids[id_key] = response.json()['id']
+            measured[name] = len(context.captured_queries)
+        return measured
+
+    def grow_dataset(self, django_user_model, ids, size):
+        from reviews.models import Category, Comment, Genre, Review, Title
+
+        category = Category.objects.get(slug='films')
+        genres = list(Genre.objects.all())
+        title = Title.objects.get(pk=ids['title_id'])
+        review = Review.objects.get(pk=ids['review_id'])
+        for idx in range(size):
+            new_title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            new_title.genre.set(genres)
+            author = django_user_model.objects.create_user(
+                username=f'reader{idx}', email=f'reader{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=idx % 10 + 1
+            )
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий'
+            )
+            Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            Category.objects.create(
+                name=f'Категория {idx}', slug=f'category-{idx}'
+            )
+
+    def test_01_read_queries_do_not_grow(self, client, admin_client, admin,
+                                         user_client, user, moderator_client,
+                                         moderator, django_user_model,
+                                         settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        ids = {
+            'title_id': titles[0]['id'],
+            'review_id': reviews[0]['id'],
+            'comment_id': comments[0]['id'],
+            'username': user.username,
+        }
+        small = self.measure_reads(client, admin_client, ids)
+        self.grow_dataset(django_user_model, ids, 12)
+        large = self.measure_reads(client, admin_client, ids)
+
+        for name, (url, budget) in self.READ_BUDGETS.items():
+            assert small[name] == large[name], (
+                f'Проверьте, что количество SQL-запросов к `{url}` не '
+                'зависит от объёма данных и размера страницы: '
+                f'{small[name]} запросов на малом наборе данных и '
+                f'{large[name]} на большом.'
+            )
+            assert large[name] <= budget, (
+                f'Проверьте, что GET-запрос к `{url}` выполняет не больше '
+                f'{budget} SQL-запросов. Сейчас выполняется {large[name]}.'
+            )
+
+    def test_02_auth_queries(self, client, django_user_model):
+        data = {'username': 'budget', 'email': 'budget@yamdb.fake'}
+        queries = count_queries(
+            client, '/api/v1/auth/signup/', method='post', data=data
+        )
+        assert queries <= self.SIGNUP_BUDGET, (
+            'Проверьте, что POST-запрос к `/api/v1/auth/signup/` выполняет '
+            f'не больше {self.SIGNUP_BUDGET} SQL-запросов. Сейчас '
+            f'выполняется {queries}.'
+        )
+
+        user = django_user_model.objects.get(username=data['username'])
+        data = {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+        queries = count_queries(
+            client, '/api/v1/auth/token/', method='post', data=data
+        )
+        assert queries <= self.TOKEN_BUDGET, (
+            'Проверьте, что POST-запрос к `/api/v1/auth/token/` выполняет '
+            f'не больше {self.TOKEN_BUDGET} SQL-запросов. Сейчас '
+            f'выполняется {queries}.'
+        )
+
+    def test_03_write_queries_do_not_grow(self, admin_client, admin,
+                                          user_client, user, moderator_client,
+                                          moderator, django_user_model):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        ids = {
+            'title_id': titles[0]['id'],
+            'review_id': reviews[0]['id'],
+            'comment_id': comments[0]['id'],
+        }
+        clients = {
+            'admin': admin_client,
+            'moderator': moderator_client,
+            'writer': user_client,
+        }
+        small = self.measure_writes(clients, 'small')
+        self.grow_dataset(django_user_model, ids, 12)
+        large = self.measure_writes(clients, 'large')
+
+        for name, (_, method, url, _, _, budget) in (
+                self.WRITE_BUDGETS.items()):
+            assert small[name] == large[name], (
+                f'Проверьте, что количество SQL-запросов при '
+                f'{method.upper()}-запросе к `{url}` не зависит от объёма '
+                f'данных: {small[name]} запросов на малом наборе данных и '
+                f'{large[name]} на большом.'
+            )
+            assert large[name] <= budget, (
+                f'Проверьте, что {method.upper()}-запрос к `{url}` выполняет '
+                f'не больше {budget} SQL-запросов. Сейчас выполняется '
+                f'{large[name]}.'
+            )
@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from tests.utils import create_reviews
+
+
+def stateless_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {user.get_tokens_for_user()}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09StatelessAuth:
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_no_user_query(self, admin_client, admin, user, moderator,
+                              settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        author_map = {
+            user: stateless_client(user),
+            moderator: stateless_client(moderator),
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        client = author_map[user]
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not [query for query in context.captured_queries
+                    if 'FROM "users_user"' in query['sql']], (
+            'Проверьте, что при аутентификации по токену с ролью '
+            'пользователь не загружается из БД.'
+        )
+
+    def test_02_permissions_from_claims(self, admin_client, admin, user,
+                                        moderator):
+        user_client = stateless_client(user)
+        moderator_client = stateless_client(moderator)
+        reviews, titles = create_reviews(admin_client, {
+            user: user_client,
+            moderator: moderator_client,
+        })
+        user_review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        moderator_review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        response = user_client.patch(
+            moderator_review_url, data={'text': 'Чужой отзыв'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что пользователь с токеном без обращения к БД не '
+            'может изменить чужой отзыв.'
+        )
+        response = user_client.patch(user_review_url, data={'score': 9})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что пользователь с токеном без обращения к БД может '
+            'изменить свой отзыв.'
+        )
+        response = moderator_client.delete(user_review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что модератор с токеном без обращения к БД может '
+            'удалить чужой отзыв.'
+        )
+        response = stateless_client(admin).post(
+            '/api/v1/categories/', data={'name': 'Комиксы', 'slug': 'comics'}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что администратор с токеном без обращения к БД '
+            'может создать категорию.'
+        )
+        response = user_client.get('/api/v1/users/me/')
+        assert response.json().get('username') == user.username, (
+            'Проверьте, что `/api/v1/users/me/` возвращает данные '
+            'пользователя из токена.'
+        )
+
+    def test_03_role_change_revokes_token(self, admin_client, user,
+                                          settings):
+        client = stateless_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после изменения роли пользователя старый токен '
+            'с ролью отклоняется.'
+        )
+
+        settings.JWT_STATELESS_AUTH = False
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что при `JWT_STATELESS_AUTH = False` пользователь '
+            'загружается из БД.'
+        )
+
+        settings.JWT_STATELESS_AUTH = True
+        user.refresh_from_db()
+        client = stateless_client(user)
+        user.is_active = False
+        user.save()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен неактивного пользователя отклоняется.'
+        )
+
+    def test_04_verified_token_cache(self, user, settings):
+        from users.authentication import verified_tokens
+
+        verified_tokens.clear()
+        client = stateless_client(user)
+        for _ in range(3):
+            assert client.get('/api/v1/users/me/').status_code == (
+                HTTPStatus.OK
+            )
+        assert verified_tokens.info() == {
+            'hits': 2, 'misses': 1, 'size': 1
+        }, (
+            'Проверьте, что подпись токена проверяется один раз, а повторные '
+            'запросы берут проверенный токен из кеша.'
+        )
+
+        settings.JWT_VERIFIED_TOKEN_CACHE_SIZE = 2
+        for _ in range(3):
+            stateless_client(user).get('/api/v1/users/me/')
+        assert verified_tokens.info()['size'] == 2, (
+            'Проверьте, что кеш проверенных токенов ограничен размером '
+            '`JWT_VERIFIED_TOKEN_CACHE_SIZE`.'
+        )
+
+        token = user.get_tokens_for_user()
+        verified_tokens.set(token, {'exp': 0})
+        assert verified_tokens.get(token) is None, (
+            'Проверьте, что просроченный токен не возвращается из кеша.'
+        )
+
+        invalid = f'{token[:-2]}xx'
+        response = APIClient().get(
+            '/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {invalid}'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен с неверной подписью отклоняется.'
+        )
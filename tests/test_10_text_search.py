@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Comment
+from tests.utils import create_reviews, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TextSearch:
+    REVIEWS_SEARCH_URL = '/api/v1/search/reviews/'
+    COMMENTS_SEARCH_URL = '/api/v1/search/comments/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def search_ids(self, client, url, **params):
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `q` '
+            'возвращает ответ со статусом 200.'
+        )
+        return [item['id'] for item in response.json()['results']]
+
+    def test_01_review_search(self, client, admin_client, admin, user_client,
+                              user, moderator_client, moderator):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        response = client.get(self.REVIEWS_SEARCH_URL)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{self.REVIEWS_SEARCH_URL}` без '
+            'параметра `q` возвращает ответ со статусом 400.'
+        )
+
+        found = self.search_ids(client, self.REVIEWS_SEARCH_URL, q='numb')
+        assert found == [review['id'] for review in reversed(reviews)], (
+            'Проверьте, что поиск по отзывам находит слова по префиксу и '
+            'возвращает сначала новые отзывы.'
+        )
+        found = self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='review 2'
+        )
+        assert found == [reviews[1]['id']], (
+            'Проверьте, что поиск по отзывам учитывает все слова запроса.'
+        )
+        found = self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='review', author=user.username
+        )
+        assert found == [reviews[1]['id']], (
+            'Проверьте, что поиск по отзывам фильтрует по автору.'
+        )
+        found = self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='review',
+            title=titles[1]['id']
+        )
+        assert found == [], (
+            'Проверьте, что поиск по отзывам фильтрует по произведению.'
+        )
+
+        detail_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[1]['id']
+        )
+        user_client.patch(detail_url, data={'text': 'Неожиданный финал'})
+        assert self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='финал'
+        ) == [reviews[1]['id']], (
+            'Проверьте, что поиск по отзывам находит изменённый текст.'
+        )
+        assert reviews[1]['id'] not in self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='review'
+        ), 'Проверьте, что поиск по отзывам не находит старый текст.'
+        user_client.delete(detail_url)
+        assert self.search_ids(
+            client, self.REVIEWS_SEARCH_URL, q='финал'
+        ) == [], 'Проверьте, что поиск по отзывам не находит удалённые.'
+
+    def test_02_comment_search_pages(self, client, admin_client, admin,
+                                     user_client, user):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        comment_ids = [
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[0]['id'],
+                f'Комментарий {index} о сюжете'
+            ).json()['id']
+            for index in range(7)
+        ]
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[1]['id'], 'Другая тема'
+        )
+
+        response = client.get(self.COMMENTS_SEARCH_URL, {'q': 'сюжет'})
+        found = []
+        while True:
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{self.COMMENTS_SEARCH_URL}` '
+                'с курсором возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert set(data['results'][0]) == {
+                'id', 'title', 'review', 'text', 'author', 'pub_date'
+            }, (
+                'Проверьте, что результаты поиска по комментариям содержат '
+                'произведение и отзыв.'
+            )
+            found += [item['id'] for item in data['results']]
+            if not data['next']:
+                break
+            response = client.get(data['next'])
+        assert found == comment_ids[::-1], (
+            'Проверьте, что курсорная пагинация поиска по комментариям '
+            'возвращает все совпадения без повторов, начиная с новых.'
+        )
+        assert self.search_ids(
+            client, self.COMMENTS_SEARCH_URL, q='сюжет',
+            review=reviews[1]['id']
+        ) == [], 'Проверьте, что поиск по комментариям фильтрует по отзыву.'
+
+        plan = Comment.objects.search('сюжет').order_by(
+            '-search_rowid'
+        ).filter(search_rowid__lt=comment_ids[-1]).explain()
+        assert 'VIRTUAL TABLE' in plan and 'TEMP B-TREE' not in plan, (
+            'Проверьте, что поиск по комментариям использует полнотекстовый '
+            'индекс и не сортирует все совпадения.'
+        )
@@ -0,0 +1,143 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import create_comments
+
+HOT_TABLES = (
+    'reviews_title',
+    'reviews_titlegenre',
+    'reviews_review',
+    'reviews_comment',
+    'users_user',
+)
+SCAN = re.compile(
+    r'SCAN (?:TABLE )?(?P<table>{})\b'.format('|'.join(HOT_TABLES))
+)
+SORT = 'USE TEMP B-TREE FOR ORDER BY'
+PAGE_COUNT_SCAN = (
+    'SCAN reviews_title USING COVERING INDEX reviews_title_category_id_f88f4f1e'
+)
+PAGE_COUNT_REASON = (
+    'нумерованная пагинация считает COUNT(*) по всем произведениям; '
+    'без подсчёта работает ?pagination=cursor'
+)
+YEAR_ORDER_SCAN = 'SCAN reviews_title USING INDEX title_year_id_idx'
+YEAR_ORDER_REASON = (
+    'страница без фильтров читается по индексу title_year_id_idx в порядке '
+    'сортировки и останавливается на LIMIT'
+)
+ALLOWED_SCANS = {
+    '/api/v1/titles/': {
+        PAGE_COUNT_SCAN: PAGE_COUNT_REASON,
+        YEAR_ORDER_SCAN: YEAR_ORDER_REASON,
+    },
+    '/api/v1/titles/?pagination=cursor': {
+        YEAR_ORDER_SCAN: YEAR_ORDER_REASON,
+    },
+    '/api/v1/titles/?facets=category,genre,year': {
+        PAGE_COUNT_SCAN: PAGE_COUNT_REASON,
+        YEAR_ORDER_SCAN: YEAR_ORDER_REASON,
+        'SCAN reviews_titlegenre USING COVERING INDEX '
+        'titlegenre_genre_title_idx': (
+            'фасет жанра без фильтров считается по всему каталогу, '
+            'кешируется вместе с фильтром только при RESPONSE_CACHE_TIMEOUT > 0'
+        ),
+        'SCAN reviews_title USING COVERING INDEX title_year_id_idx': (
+            'фасет года без фильтров считается по всему каталогу, '
+            'кешируется вместе с фильтром только при RESPONSE_CACHE_TIMEOUT > 0'
+        ),
+    },
+    '/api/v1/titles/top/': {
+        'SCAN reviews_title USING INDEX title_weighted_rating_idx': (
+            'топ без фильтров читается по индексу title_weighted_rating_idx '
+            'в порядке рейтинга и останавливается на LIMIT'
+        ),
+    },
+}
+
+
+def query_plans(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            yield query['sql'], '\n'.join(
+                row[-1] for row in cursor.fetchall()
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryPlans:
+
+    def test_01_no_full_scans(self, client, admin_client, admin,
+                              user_client, user, settings):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Планы запросов проверяются только для SQLite.')
+        settings.RESPONSE_CACHE_TIMEOUT = 0
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        urls = (
+            ('/api/v1/titles/', False),
+            ('/api/v1/titles/?pagination=cursor', True),
+            ('/api/v1/titles/?category=films', True),
+            ('/api/v1/titles/?year=1984', True),
+            ('/api/v1/titles/?genre=horror,comedy&genre_mode=all', False),
+            ('/api/v1/titles/?search=terminator', False),
+            ('/api/v1/titles/?facets=category,genre,year', False),
+            ('/api/v1/titles/?facets=genre,year&category=films', False),
+            ('/api/v1/titles/top/', True),
+            ('/api/v1/titles/top/?category=films', True),
+            ('/api/v1/titles/top/?genre=horror', True),
+            (f'/api/v1/titles/{title_id}/', True),
+            (f'/api/v1/titles/{title_id}/rating/', True),
+            (reviews_url, True),
+            (f'{reviews_url}{review_id}/', True),
+            (comments_url, True),
+            (f'{comments_url}{comments[0]["id"]}/', True),
+            ('/api/v1/search/reviews/?q=review', True),
+            (f'/api/v1/search/comments/?q=comment&title={title_id}', True),
+        )
+        seen = set()
+        for url, sorted_by_index in urls:
+            allowed = ALLOWED_SCANS.get(url, {})
+            for sql, plan in query_plans(client, url):
+                for line in plan.splitlines():
+                    match = SCAN.search(line)
+                    assert match is None or line.strip() in allowed, (
+                        f'Проверьте, что GET-запрос к `{url}` не просматривает '
+                        f'таблицу `{match and match["table"]}` целиком, даже '
+                        f'по индексу. Запрос: {sql}\nПлан:\n{plan}'
+                    )
+                    if match:
+                        seen.add((url, line.strip()))
+                paginated = ' LIMIT ' in sql
+                assert not (sorted_by_index and paginated) or (
+                    SORT not in plan
+                ), (
+                    f'Проверьте, что GET-запрос к `{url}` читает строки в '
+                    f'порядке индекса без сортировки. Запрос: {sql}\n'
+                    f'План:\n{plan}'
+                )
+        unused = [
+            (url, line) for url, lines in ALLOWED_SCANS.items()
+            for line in lines if (url, line) not in seen
+        ]
+        assert not unused, (
+            'Проверьте, что разрешённые просмотры таблиц в `ALLOWED_SCANS` '
+            f'ещё встречаются в планах запросов: {unused}'
+        )
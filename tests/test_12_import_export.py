@@ -0,0 +1,221 @@
+import gzip
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from reviews.constants import CSV_FILE_NAMES
+from reviews.management.commands.import_csv import (CHECKPOINT_SUFFIX,
+                                                    MODEL_MAPPING, Command,
+                                                    dependency_order,
+                                                    read_csv)
+from reviews.models import Review, Title, TitleGenre
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+VOLATILE_FIELDS = ('modified', 'version', 'date_joined', 'last_login')
+
+
+def snapshot():
+    return {
+        name: list(model.objects.order_by('pk').values_list(*(
+            field.attname for field in model._meta.concrete_fields
+            if field.name not in VOLATILE_FIELDS
+        )))
+        for name, model in MODEL_MAPPING.items()
+    }
+
+
+def check_weighted_ratings(command):
+    ratings = dict(Title.objects.values_list('pk', 'weighted_rating'))
+    assert all(ratings.values()), (
+        f'Проверьте, что после `{command}` у всех произведений пересчитан '
+        'взвешенный рейтинг.'
+    )
+    assert all(
+        ratings[title_id] == rating
+        for title_id, rating in TitleGenre.objects.values_list(
+            'title_id', 'weighted_rating'
+        )
+    ), (
+        f'Проверьте, что после `{command}` связи произведений с жанрами '
+        'получают взвешенный рейтинг произведения.'
+    )
+
+
+def clear_data():
+    for name in reversed(dependency_order(MODEL_MAPPING)):
+        MODEL_MAPPING[name].objects.all().delete()
+
+
+def import_csv(*args):
+    call_command('import_csv', *args, stdout=StringIO())
+
+
+def import_models(data_dir, *options):
+    for name in dependency_order(MODEL_MAPPING):
+        import_csv(name, os.path.join(data_dir, CSV_FILE_NAMES[name]),
+                   *options)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ImportExport:
+
+    def test_01_import_modes_match(self, tmp_path):
+        data_dir = str(tmp_path / 'data')
+        shutil.copytree(DATA_DIR, data_dir)
+        gzip_dir = tmp_path / 'gzip'
+        gzip_dir.mkdir()
+        for file_name in CSV_FILE_NAMES.values():
+            with open(os.path.join(data_dir, file_name), 'rb') as source, (
+                    gzip.open(gzip_dir / f'{file_name}.gz', 'wb')) as target:
+                shutil.copyfileobj(source, target)
+
+        import_models(data_dir)
+        expected = snapshot()
+        assert all(expected.values()), (
+            'Проверьте, что `import_csv` построчно загружает все файлы из '
+            '`static/data`.'
+        )
+        check_weighted_ratings('import_csv')
+        modes = (
+            ('--batch-size', lambda: import_models(
+                data_dir, '--batch-size', '7'
+            )),
+            ('--stream', lambda: import_models(
+                data_dir, '--stream', '--batch-size', '7'
+            )),
+            ('--all', lambda: import_csv(
+                '--all', data_dir, '--batch-size', '7', '--workers', '1'
+            )),
+            ('--all с gzip', lambda: import_csv(
+                '--all', str(gzip_dir), '--workers', '2'
+            )),
+        )
+        for mode, run_import in modes:
+            clear_data()
+            run_import()
+            assert snapshot() == expected, (
+                f'Проверьте, что `import_csv` в режиме {mode} загружает те '
+                'же строки, что и построчный импорт, и пересчитывает '
+                'рейтинги произведений.'
+            )
+        assert not [name for name in os.listdir(data_dir)
+                    if name.endswith(CHECKPOINT_SUFFIX)], (
+            'Проверьте, что потоковый импорт удаляет контрольные точки.'
+        )
+
+    def test_02_export_import_round_trip(self, tmp_path):
+        import_csv('--all', DATA_DIR, '--workers', '1')
+        imported = snapshot()
+        assert all(imported.values()), (
+            'Проверьте, что `import_csv --all` загружает все файлы из '
+            '`static/data`.'
+        )
+        call_command(
+            'export_data', str(tmp_path), '--gzip', '--chunk-size', '7',
+            stdout=StringIO()
+        )
+        clear_data()
+        import_csv('--all', str(tmp_path), '--workers', '1')
+        assert snapshot() == imported, (
+            'Проверьте, что данные, выгруженные `export_data`, загружаются '
+            'обратно `import_csv --all` без изменений, включая даты '
+            'публикации и пустые значения.'
+        )
+
+    def test_03_resume_after_crash_before_checkpoint(self, tmp_path,
+                                                     monkeypatch):
+        for name in ('User', 'Category', 'Genre', 'Title'):
+            import_csv(name, os.path.join(DATA_DIR, CSV_FILE_NAMES[name]),
+                       '--batch-size', '10')
+        reviews_path = str(tmp_path / CSV_FILE_NAMES['Review'])
+        shutil.copy(
+            os.path.join(DATA_DIR, CSV_FILE_NAMES['Review']), reviews_path
+        )
+        save_checkpoint = Command.save_checkpoint
+        calls = []
+
+        def crash_on_second_checkpoint(self, path, checkpoint):
+            calls.append(checkpoint['rows'])
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            save_checkpoint(self, path, checkpoint)
+
+        monkeypatch.setattr(
+            Command, 'save_checkpoint', crash_on_second_checkpoint
+        )
+        with pytest.raises(KeyboardInterrupt):
+            import_csv('Review', reviews_path, '--stream', '--batch-size',
+                       '30')
+        assert Review.objects.count() == 60, (
+            'Проверьте, что потоковый импорт фиксирует каждую пачку '
+            'отдельной транзакцией.'
+        )
+        monkeypatch.setattr(Command, 'save_checkpoint', save_checkpoint)
+        import_csv('Review', reviews_path, '--resume', '--batch-size', '30')
+        expected = len(read_csv(
+            os.path.join(DATA_DIR, CSV_FILE_NAMES['Review'])
+        ))
+        assert Review.objects.count() == expected, (
+            'Проверьте, что `import_csv --resume` завершает импорт, если '
+            'сбой произошёл после фиксации пачки, но до записи контрольной '
+            'точки.'
+        )
+        assert not os.path.exists(reviews_path + CHECKPOINT_SUFFIX), (
+            'Проверьте, что после завершения импорта контрольная точка '
+            'удаляется.'
+        )
+
+    def test_04_import_errors(self, tmp_path):
+        reviews_path = os.path.join(DATA_DIR, CSV_FILE_NAMES['Review'])
+        for args, message in (
+            (('Review', str(tmp_path / 'review.csv'), '--resume'),
+             'без контрольной точки'),
+            (('Review', reviews_path, '--all', DATA_DIR),
+             'с моделью и параметром --all'),
+            (('Review', reviews_path, '--batch-size', '0'),
+             'с нулевым размером пачки'),
+            (('--all', DATA_DIR, '--workers', '0'),
+             'с нулевым числом процессов'),
+            (('Review', reviews_path, '--batch-size', '10'),
+             'с отсутствующими авторами'),
+        ):
+            with pytest.raises(CommandError):
+                import_csv(*args)
+            assert not Review.objects.exists(), (
+                f'Проверьте, что `import_csv` {message} завершается ошибкой '
+                'и ничего не загружает.'
+            )
+
+    def test_05_generate_data(self):
+        for args in (('--reviews', '-5'), ('--comments', '-1'),
+                     ('--zipf', '0'), ('--titles', '0')):
+            with pytest.raises(CommandError):
+                call_command('generate_data', *args, stdout=StringIO())
+        call_command(
+            'generate_data', '--reviews', '300', '--titles', '20',
+            '--users', '30', '--seed', '1', stdout=StringIO()
+        )
+        assert Review.objects.count() == 300, (
+            'Проверьте, что `generate_data` создаёт заданное число отзывов.'
+        )
+        check_weighted_ratings('generate_data')
+        call_command('check_ratings', stdout=StringIO())
+
+    def test_06_bulk_commands_reset_response_cache(self, client, settings):
+        settings.RESPONSE_CACHE_TIMEOUT = 60
+        import_csv('--all', DATA_DIR, '--workers', '1')
+        for url in ('/api/v1/titles/', '/api/v1/genres/'):
+            cached = client.get(url).json()['count']
+            call_command(
+                'generate_data', '--reviews', '10', '--titles', '2',
+                '--users', '10', '--genres', '2', '--seed', '2',
+                stdout=StringIO()
+            )
+            assert client.get(url).json()['count'] > cached, (
+                f'Проверьте, что массовые команды сбрасывают кеш ответов '
+                f'`{url}`.'
+            )
@@ -0,0 +1,54 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Benchmark:
+
+    def test_01_benchmark_existing_db(self, tmp_path):
+        call_command(
+            'generate_data', '--reviews', '200', '--titles', '10',
+            '--users', '20', stdout=StringIO()
+        )
+        users = set(User.objects.values_list('username', flat=True))
+        baseline = tmp_path / 'baseline.json'
+        call_command(
+            'benchmark', '--existing-db', '--requests', '2', '--warmup', '0',
+            '--concurrency', '1', '--save-baseline', str(baseline),
+            stdout=StringIO()
+        )
+        report = json.loads(baseline.read_text(encoding='utf-8'))
+        assert {'titles_list', 'reviews_list', 'signup', 'token'} <= set(
+            report['endpoints']
+        ), 'Проверьте, что `benchmark` запускает все сценарии.'
+        assert not any(
+            result['errors'] for result in report['endpoints'].values()
+        ), 'Проверьте, что сценарии `benchmark` выполняются без ошибок.'
+        assert set(User.objects.values_list('username', flat=True)) == (
+            users
+        ), (
+            'Проверьте, что `benchmark --existing-db` удаляет созданных '
+            'тестом пользователей.'
+        )
+        call_command(
+            'benchmark', '--existing-db', '--requests', '2', '--warmup', '0',
+            '--concurrency', '1', '--baseline', str(baseline),
+            '--tolerance', '1000', '--endpoints', 'title_detail',
+            stdout=StringIO()
+        )
+
+    def test_02_benchmark_arguments(self):
+        for args in (('--existing-db', '--generate', '100'),
+                     ('--generate', '0'),
+                     ('--requests', '1')):
+            with pytest.raises(CommandError):
+                call_command('benchmark', *args, stdout=StringIO())
+        with pytest.raises(CommandError):
+            call_command('benchmark', '--existing-db', stdout=StringIO())
@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 check_name_and_slug_patterns = (
     (
         {
@@ -304,3 +307,48 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def count_queries(client, url, method='get', data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    assert response.status_code < HTTPStatus.BAD_REQUEST, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` выполняется '
+        f'успешно. Сейчас возвращается статус {response.status_code}.'
+    )
+    return len(context.captured_queries)
+
+
+def check_not_modified(client, url):
+    response = client.get(url)
+    etag = response.get('ETag')
+    assert etag and response.get('Last-Modified'), (
+        f'Проверьте, что ответ на GET-запрос к `{url}` содержит заголовки '
+        '`ETag` и `Last-Modified`.'
+    )
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        f'Проверьте, что GET-запрос к `{url}` с актуальным `If-None-Match` '
+        'возвращает ответ со статусом 304.'
+    )
+    assert len(context.captured_queries) == 1, (
+        f'Проверьте, что ответ 304 на GET-запрос к `{url}` формируется '
+        'одним запросом к БД.'
+    )
+    assert not response.content, (
+        f'Проверьте, что ответ 304 на GET-запрос к `{url}` не содержит тела.'
+    )
+    return etag
+
+
+def check_modified(client, url, etag, action):
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что после {action} GET-запрос к `{url}` со старым '
+        '`If-None-Match` возвращает ответ со статусом 200.'
+    )
+    assert response.get('ETag') != etag, (
+        f'Проверьте, что после {action} меняется `ETag` ответа на '
+        f'GET-запрос к `{url}`.'
+    )